@@ -0,0 +1,214 @@
+"""
+Packed audio shards: a whole LJSpeech-style dataset in a few large files.
+
+Layout of a shard directory:
+    info.json        sample rate, sample dtype (int16), shard file names
+    shard_000.bin    raw little-endian int16 samples of many utterances, back to back
+    shard_001.bin    ...
+    index.tsv        id <TAB> shard <TAB> offset <TAB> length <TAB> text
+                     (offset/length in samples; text is metadata.csv's text fields)
+
+Shards are opened with numpy.memmap, so an utterance is a zero-copy view into
+the page cache — no open/seek/decode per utterance per epoch.
+
+    dataset = ShardDataset("data/ljspeech_filtered/shards")
+    utt_id, samples, text = dataset[0]          # samples: int16 memmap view
+    audio = dataset.audio("00042")              # float32 in [-1, 1)
+    for utt_id, samples, text in dataset: ...   # sequential, shard by shard
+
+Usage:
+    python scripts/audio_shards.py pack data/ljspeech_filtered data/ljspeech_filtered/shards
+    python scripts/audio_shards.py unpack data/ljspeech_filtered/shards data/ljspeech_unpacked
+"""
+import os
+import json
+import argparse
+
+import numpy as np
+
+SHARD_BYTES = 1 << 30          # start a new shard file after ~1 GiB
+FORMAT_VERSION = 1
+
+
+class ShardWriter:
+    """
+    Append utterances to shard files in *directory*; close() writes the
+    index and info.json.  Audio may be int16 or float (converted to int16
+    the way soundfile writes 16-bit PCM).
+    """
+
+    def __init__(self, directory, sample_rate, shard_bytes=SHARD_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.shard_bytes = shard_bytes
+        self.shards = []
+        self.index = []
+        self._file = None
+        self._offset = 0
+
+    def _next_shard(self):
+        if self._file:
+            self._file.close()
+        name = f"shard_{len(self.shards):03d}.bin"
+        self.shards.append(name)
+        self._file = open(os.path.join(self.directory, name), 'wb')
+        self._offset = 0
+
+    def add(self, utt_id, audio, text):
+        if audio.dtype != np.int16:
+            audio = np.clip(np.round(audio * 32768.0), -32768, 32767).astype(np.int16)
+        if self._file is None or (self._offset and
+                                  (self._offset + len(audio)) * 2 > self.shard_bytes):
+            self._next_shard()
+        self._file.write(audio.astype('<i2', copy=False).tobytes())
+        self.index.append((utt_id, len(self.shards) - 1, self._offset, len(audio),
+                           ' '.join(text.split('\t'))))
+        self._offset += len(audio)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        with open(os.path.join(self.directory, "index.tsv"), 'w',
+                  encoding='utf-8', newline='\n') as f:
+            for utt_id, shard, offset, length, text in self.index:
+                f.write(f"{utt_id}\t{shard}\t{offset}\t{length}\t{text}\n")
+        with open(os.path.join(self.directory, "info.json"), 'w', encoding='utf-8') as f:
+            json.dump({'version': FORMAT_VERSION, 'sample_rate': self.sample_rate,
+                       'dtype': 'int16', 'shards': self.shards,
+                       'utterances': len(self.index)}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardDataset:
+    """Random access and sequential iteration over a shard directory."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "info.json"), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{directory}: unsupported shard format {info.get('version')}")
+        self.directory = directory
+        self.sample_rate = info['sample_rate']
+        self.shards = [np.memmap(os.path.join(directory, name), dtype='<i2', mode='r')
+                       if os.path.getsize(os.path.join(directory, name)) else np.zeros(0, '<i2')
+                       for name in info['shards']]
+
+        self.ids, self.texts = [], []
+        locations = []
+        with open(os.path.join(directory, "index.tsv"), 'r', encoding='utf-8') as f:
+            for line in f:
+                utt_id, shard, offset, length, text = line.rstrip('\n').split('\t', 4)
+                self.ids.append(utt_id)
+                self.texts.append(text)
+                locations.append((int(shard), int(offset), int(length)))
+        # One (shard, offset, length) row per utterance
+        self.locations = np.array(locations, dtype=np.int64).reshape(-1, 3)
+        self._position = {utt_id: i for i, utt_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _resolve(self, key):
+        return self._position[key] if isinstance(key, str) else key
+
+    def samples(self, key):
+        """int16 samples of utterance *key* (index or id) — a memmap view, no copy."""
+        shard, offset, length = self.locations[self._resolve(key)]
+        return self.shards[shard][offset:offset + length]
+
+    def audio(self, key):
+        """float32 samples in [-1, 1) of utterance *key*."""
+        return self.samples(key).astype(np.float32) / 32768.0
+
+    def __getitem__(self, key):
+        i = self._resolve(key)
+        return self.ids[i], self.samples(i), self.texts[i]
+
+    def __iter__(self):
+        for i in range(len(self.ids)):
+            yield self[i]
+
+    def duration(self):
+        """Total audio in seconds."""
+        return float(self.locations[:, 2].sum()) / self.sample_rate
+
+
+def read_metadata(ljspeech_dir):
+    """[(id, text fields)] from an LJSpeech metadata.csv (id|text|normalized)."""
+    rows = []
+    with open(os.path.join(ljspeech_dir, "metadata.csv"), 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line:
+                utt_id, _, text = line.partition('|')
+                rows.append((utt_id, text))
+    return rows
+
+
+def ljspeech_to_shards(ljspeech_dir, shard_dir, shard_bytes=SHARD_BYTES):
+    """Pack an LJSpeech directory (metadata.csv + wavs/) into *shard_dir*."""
+    import soundfile as sf
+
+    def wav_path(utt_id):
+        return os.path.join(ljspeech_dir, "wavs", f"{utt_id}.wav")
+
+    rows = read_metadata(ljspeech_dir)
+    sample_rate = sf.info(wav_path(rows[0][0])).samplerate if rows else 0
+    with ShardWriter(shard_dir, sample_rate, shard_bytes) as writer:
+        for utt_id, text in rows:
+            samples, sr = sf.read(wav_path(utt_id), dtype='int16', always_2d=True)
+            if sr != sample_rate:
+                raise ValueError(f"{utt_id}.wav is {sr} Hz, expected {sample_rate} Hz")
+            writer.add(utt_id, samples.mean(axis=1).astype(np.int16)
+                       if samples.shape[1] > 1 else samples[:, 0], text)
+    return len(rows)
+
+
+def shards_to_ljspeech(shard_dir, ljspeech_dir):
+    """Unpack *shard_dir* into metadata.csv + wavs/ (16-bit PCM), e.g. for piper_train.preprocess."""
+    import soundfile as sf
+
+    dataset = ShardDataset(shard_dir)
+    os.makedirs(os.path.join(ljspeech_dir, "wavs"), exist_ok=True)
+    lines = []
+    for utt_id, samples, text in dataset:
+        sf.write(os.path.join(ljspeech_dir, "wavs", f"{utt_id}.wav"), samples,
+                 dataset.sample_rate, subtype='PCM_16')
+        lines.append(f"{utt_id}|{text}")
+    with open(os.path.join(ljspeech_dir, "metadata.csv"), 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(lines))
+    return len(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack / unpack LJSpeech datasets as int16 shards")
+    sub = parser.add_subparsers(dest='command', required=True)
+    pack = sub.add_parser('pack', help='LJSpeech directory -> shard directory')
+    pack.add_argument('ljspeech_dir')
+    pack.add_argument('shard_dir')
+    pack.add_argument('--shard-mb', type=int, default=SHARD_BYTES >> 20,
+                      help='Start a new shard file after this many MiB')
+    unpack = sub.add_parser('unpack', help='shard directory -> LJSpeech directory')
+    unpack.add_argument('shard_dir')
+    unpack.add_argument('ljspeech_dir')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        count = ljspeech_to_shards(args.ljspeech_dir, args.shard_dir, args.shard_mb << 20)
+        dataset = ShardDataset(args.shard_dir)
+        print(f"Packed {count} utterances ({dataset.duration() / 3600:.2f} h) into "
+              f"{len(dataset.shards)} shard(s): {args.shard_dir}")
+    else:
+        count = shards_to_ljspeech(args.shard_dir, args.ljspeech_dir)
+        print(f"Unpacked {count} utterances into: {args.ljspeech_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Length-bucketed batch assignments for training.
+
+Utterances run from MIN_DURATION to MAX_DURATION seconds, so a random batch of
+32 is padded to its longest member and most of it is silence.  This tool
+reads lengths.tsv (written by format_data.py: id, seconds, text length) and
+groups utterances of similar length:
+  - utterances are sorted into buckets --bucket-seconds wide (shuffled within
+    each bucket, so epochs differ with --seed) and cut into batches in order
+  - a batch holds either --batch-size utterances, or as many as fit in
+    --max-frames padded mel frames (longest member x batch size)
+  - batch order is shuffled; the manifest lists utterance ids per batch
+The padded-frame and padded-character ratios are reported next to random
+batching with the same number of batches.
+
+Frames use the hop length and sample rate of the Piper training config
+(see mel_cache.py), so a frame budget means the same thing as on the GPU.
+
+Usage:
+    python scripts/batch_buckets.py --batch-size 32
+    python scripts/batch_buckets.py --max-frames 20000 --output data/ljspeech_filtered/batches.json
+"""
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from mel_cache import DATASET_DIR, TRAINING_CONFIG, load_params
+
+LENGTHS_FILE = os.path.join(DATASET_DIR, "lengths.tsv")
+BATCHES_FILE = os.path.join(DATASET_DIR, "batches.json")
+
+
+def read_lengths(path):
+    """(ids, seconds, text lengths) from a lengths.tsv."""
+    ids, seconds, chars = [], [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                utt_id, duration, text_len = line.rstrip('\n').split('\t')
+                ids.append(utt_id)
+                seconds.append(float(duration))
+                chars.append(int(text_len))
+    return ids, np.array(seconds), np.array(chars, dtype=np.int64)
+
+
+def bucketed_order(seconds, bucket_seconds, rng):
+    """Indices sorted by bucket, in random order within each bucket."""
+    buckets = np.floor(seconds / bucket_seconds).astype(np.int64)
+    return np.lexsort((rng.random(len(seconds)), buckets))
+
+
+def cut_fixed(order, batch_size):
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def cut_frame_budget(order, frames, max_frames):
+    """Batches whose padded size (longest x count) stays within *max_frames*."""
+    batches, current, longest = [], [], 0
+    for i in order:
+        longest_with = max(longest, frames[i])
+        if current and longest_with * (len(current) + 1) > max_frames:
+            batches.append(np.array(current))
+            current, longest_with = [], frames[i]
+        current.append(i)
+        longest = longest_with
+    if current:
+        batches.append(np.array(current))
+    return batches
+
+
+def padding_ratio(batches, lengths):
+    """Share of the padded batch tensors that is padding."""
+    padded = sum(int(lengths[b].max()) * len(b) for b in batches)
+    return 1.0 - float(lengths.sum()) / max(padded, 1)
+
+
+def random_batches(n, n_batches, rng):
+    return np.array_split(rng.permutation(n), max(n_batches, 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build length-bucketed training batches")
+    parser.add_argument("--lengths", default=LENGTHS_FILE, help="lengths.tsv from format_data.py")
+    parser.add_argument("--config", default=TRAINING_CONFIG,
+                        help="Piper training config.json (hop length / sample rate)")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--batch-size", type=int, default=32,
+                      help="Utterances per batch (default: 32, as train.sh)")
+    size.add_argument("--max-frames", type=int, default=None,
+                      help="Padded mel frames per batch instead of a fixed count")
+    parser.add_argument("--bucket-seconds", type=float, default=0.5,
+                        help="Bucket width in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=BATCHES_FILE, help="Batch manifest (JSON)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.lengths):
+        print(f"ERROR: Missing {args.lengths}")
+        print("Run 'python scripts/format_data.py' first.")
+        sys.exit(1)
+
+    ids, seconds, chars = read_lengths(args.lengths)
+    if not ids:
+        print(f"ERROR: {args.lengths} is empty")
+        sys.exit(1)
+    params = load_params(args.config)
+    frames = np.maximum(seconds * params['sample_rate'] // params['hop_length'], 1).astype(np.int64)
+    if args.max_frames is not None and args.max_frames < frames.max():
+        parser.error(f"--max-frames {args.max_frames} is below the longest utterance "
+                     f"({frames.max()} frames)")
+
+    rng = np.random.default_rng(args.seed)
+    order = bucketed_order(seconds, args.bucket_seconds, rng)
+    if args.max_frames is not None:
+        batches = cut_frame_budget(order, frames, args.max_frames)
+    else:
+        batches = cut_fixed(order, args.batch_size)
+    batches = [batches[i] for i in rng.permutation(len(batches))]
+    baseline = random_batches(len(ids), len(batches), rng)
+
+    manifest = {
+        'config': {'lengths': os.path.abspath(args.lengths), 'batch_size': args.batch_size
+                   if args.max_frames is None else None, 'max_frames': args.max_frames,
+                   'bucket_seconds': args.bucket_seconds, 'seed': args.seed,
+                   'sample_rate': params['sample_rate'], 'hop_length': params['hop_length']},
+        'batches': [[ids[i] for i in batch] for batch in batches],
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    sizes = np.array([len(b) for b in batches])
+    print(f"=== Length-Bucketed Batches ===")
+    print(f"  Utterances:   {len(ids)} ({seconds.sum() / 3600:.2f} h)")
+    print(f"  Batches:      {len(batches)} (size {sizes.min()}-{sizes.max()}, "
+          f"mean {sizes.mean():.1f})")
+    print(f"  Padding            bucketed    random")
+    print(f"    audio frames     {padding_ratio(batches, frames):>8.1%}  "
+          f"{padding_ratio(baseline, frames):>8.1%}")
+    print(f"    text characters  {padding_ratio(batches, chars):>8.1%}  "
+          f"{padding_ratio(baseline, chars):>8.1%}")
+    print(f"  Manifest:     {args.output}")
+
+
+if __name__ == "__main__":
+    main()
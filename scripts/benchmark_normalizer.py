@@ -0,0 +1,210 @@
+"""
+Benchmark the Marathi text normaliser on a synthetic, reproducible corpus.
+
+Generates Marathi-like sentences with a controllable share of numbers, dates,
+times, currency, percentages, ordinals, decimals and abbreviations, then
+measures normalize_text and number_to_marathi:
+  - sentences/sec and chars/sec (calls/sec for number_to_marathi)
+  - p50 / p99 per-call latency
+Results are written as JSON so runs can be compared; --baseline fails the run
+when throughput drops more than --max-regression percent.
+
+Usage:
+    python scripts/benchmark_normalizer.py
+    python scripts/benchmark_normalizer.py --sentences 50000 --numbers 0.2 --output bench.json
+    python scripts/benchmark_normalizer.py --baseline bench.json --max-regression 10
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+import normalize_marathi
+from normalize_marathi import normalize_text, number_to_marathi, ABBREVIATIONS
+
+WORDS = (
+    'आज तापमान अंश आहे पाटील यांनी दिले मध्ये राज्यात लोक जानेवारी वर्ष किंमत '
+    'आला दिवस स्वातंत्र्य दिन सकाळी वाजता खर्च केले मतदान झाले देशपांडे आल्या '
+    'अंतर शहरात पाऊस सरकारने निर्णय घेतला विद्यार्थी परीक्षा निकाल जाहीर बाजारात '
+    'भाव वाढले शेतकरी पीक धरण पाणीसाठा रुग्णालयात उपचार सुरू सामना जिंकला'
+).split()
+
+# Token kinds a sentence slot can be replaced with, and their generators.
+TOKEN_KINDS = {
+    'numbers':       lambda rng: str(int(10 ** rng.uniform(0, 8))),
+    'decimals':      lambda rng: f'{rng.randint(0, 999)}.{rng.randint(0, 99)}',
+    'dates':         lambda rng: f'{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1900, 2030)}',
+    'times':         lambda rng: f'{rng.randint(1, 12)}:{rng.randint(0, 59):02d}',
+    'currency':      lambda rng: rng.choice('₹₹₹$€') + str(rng.randint(1, 100000)),
+    'percentages':   lambda rng: f'{rng.randint(1, 100)}%',
+    'ordinals':      lambda rng: f'{rng.randint(1, 30)}{rng.choice(["ला", "ली", "वा", "वी", "रा"])}',
+    'abbreviations': lambda rng: rng.choice(sorted(ABBREVIATIONS)),
+}
+
+
+def generate_corpus(n_sentences, densities, seed=0, min_words=6, max_words=16):
+    """
+    Build *n_sentences* sentences.  *densities* maps a TOKEN_KINDS name to the
+    probability that any one word slot is replaced by a token of that kind.
+    """
+    rng = random.Random(seed)
+    kinds = [(kind, p) for kind, p in densities.items() if p > 0]
+    corpus = []
+    for _ in range(n_sentences):
+        tokens = []
+        for _ in range(rng.randint(min_words, max_words)):
+            roll = rng.random()
+            for kind, p in kinds:
+                if roll < p:
+                    tokens.append(TOKEN_KINDS[kind](rng))
+                    break
+                roll -= p
+            else:
+                tokens.append(rng.choice(WORDS))
+        corpus.append(' '.join(tokens) + rng.choice(['.', '।', '', '?']))
+    return corpus
+
+
+def generate_numbers(n, seed=0):
+    """Integer strings, log-uniform from 0 to 10^10 (hits every number branch)."""
+    rng = random.Random(seed)
+    return [str(int(10 ** rng.uniform(0, 10))) for _ in range(n)]
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(func, inputs, repeat=3):
+    """
+    Time *func* over *inputs*.  Throughput is taken from the fastest of
+    *repeat* whole passes; latency percentiles from per-call timings.
+    """
+    for item in inputs[:100]:                 # warm caches / lazy tables
+        func(item)
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+
+    clock = time.perf_counter_ns
+    latencies = []
+    for item in inputs:
+        start = clock()
+        func(item)
+        latencies.append(clock() - start)
+    latencies.sort()
+
+    chars = sum(len(item) for item in inputs)
+    return {
+        'items': len(inputs),
+        'seconds': round(best, 6),
+        'items_per_sec': round(len(inputs) / best, 1),
+        'chars_per_sec': round(chars / best, 1),
+        'p50_us': round(_percentile(latencies, 0.50) / 1000, 2),
+        'p99_us': round(_percentile(latencies, 0.99) / 1000, 2),
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Return a list of human-readable regressions (empty if none)."""
+    failures = []
+    for name, current in results['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        change = (current['items_per_sec'] / before['items_per_sec'] - 1) * 100
+        print(f"  {name:20s} {before['items_per_sec']:>12.0f} -> "
+              f"{current['items_per_sec']:>12.0f} items/s ({change:+.1f}%)")
+        if change < -max_regression:
+            failures.append(f"{name}: throughput {change:+.1f}% (limit -{max_regression}%)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Marathi text normaliser")
+    parser.add_argument("--sentences", type=int, default=20000,
+                        help="Synthetic sentences to generate")
+    parser.add_argument("--numbers-count", type=int, default=100000,
+                        help="Integers to feed number_to_marathi")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed passes; the fastest is reported")
+    defaults = {'numbers': 0.05, 'decimals': 0.01, 'dates': 0.01, 'times': 0.01,
+                'currency': 0.01, 'percentages': 0.01, 'ordinals': 0.01,
+                'abbreviations': 0.02}
+    for kind, density in defaults.items():
+        parser.add_argument(f"--{kind}", type=float, default=density,
+                            help=f"Share of words that are {kind} (default: {density})")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None,
+                        help="Compare against a previous results JSON")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Fail if throughput drops more than this percent vs --baseline")
+    args = parser.parse_args()
+
+    densities = {kind: getattr(args, kind) for kind in TOKEN_KINDS}
+    if sum(densities.values()) > 1:
+        parser.error("token densities must add up to at most 1")
+
+    print(f"Generating {args.sentences} sentences (seed {args.seed})...")
+    corpus = generate_corpus(args.sentences, densities, args.seed)
+    numbers = generate_numbers(args.numbers_count, args.seed)
+
+    results = {
+        'config': {
+            'sentences': args.sentences,
+            'numbers_count': args.numbers_count,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'densities': densities,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'normalizer_version': normalize_marathi.NORMALIZER_VERSION,
+        },
+        'results': {
+            'normalize_text': measure(normalize_text, corpus, args.repeat),
+            'number_to_marathi': measure(number_to_marathi, numbers, args.repeat),
+        },
+    }
+
+    print(f"\n=== Normaliser Benchmark ===")
+    for name, r in results['results'].items():
+        print(f"  {name}")
+        print(f"    Throughput:  {r['items_per_sec']:>12,.0f} items/s  "
+              f"{r['chars_per_sec']:>14,.0f} chars/s")
+        print(f"    Latency:     p50 {r['p50_us']:.1f} µs   p99 {r['p99_us']:.1f} µs")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nResults written to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print("\nWARNING: baseline was run with a different configuration.")
+        print(f"\n=== Compared with {args.baseline} ===")
+        failures = compare(results, baseline, args.max_regression)
+        if failures:
+            print("\nREGRESSION:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("  No regression beyond the allowed margin.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Benchmark the resampling backends in format_data.RESAMPLERS.
+
+Each backend resamples the same inputs to TARGET_SR and is compared with an
+FFT (ideal band-limited) reference:
+  - speed: seconds of audio resampled per wall-clock second (x realtime)
+  - spectral error: log-spectral distance in dB below 90% of the lower of
+    the two Nyquist frequencies (the transition band is each filter's own
+    business)
+  - SNR against the reference over the same band, in dB
+Inputs are synthetic (tones + chirp + noise at --rates) or, with --wavs, the
+first --limit files of a corpus directory at their own rates.  The fastest
+backend within --max-error-db is recommended.
+
+Usage:
+    python scripts/benchmark_resampling.py
+    python scripts/benchmark_resampling.py --rates 48000 44100 16000 --seconds 20
+    python scripts/benchmark_resampling.py --wavs data/mr_in_female --limit 50 --output resample.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from functools import partial
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from format_data import RESAMPLERS, TARGET_SR, resample_poly
+
+
+def synthetic_signal(sr, seconds, seed=0):
+    """Log-spaced tones up to 0.45 * sr, a full-band chirp and -30 dB noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * seconds)) / sr
+    y = np.zeros_like(t)
+    for freq in np.geomspace(60, 0.45 * sr, 24):
+        y += np.sin(2 * np.pi * freq * t + rng.uniform(0, 2 * np.pi))
+    y /= 24
+    y += 0.3 * np.sin(2 * np.pi * (50 + 0.45 * sr / (2 * seconds) * t) * t)
+    y += 10 ** (-30 / 20) * rng.standard_normal(len(t))
+    return (0.5 * y / np.abs(y).max()).astype(np.float32)
+
+
+def load_wavs(directory, limit):
+    import soundfile as sf
+
+    inputs = []
+    for name in sorted(os.listdir(directory))[:limit]:
+        if name.lower().endswith('.wav'):
+            y, sr = sf.read(os.path.join(directory, name), dtype='float32', always_2d=True)
+            inputs.append((name, y.mean(axis=1), sr))
+    return inputs
+
+
+def reference(y, sr, target_sr):
+    from scipy.signal import resample
+
+    return resample(y.astype(np.float64), -(-len(y) * target_sr // sr))
+
+
+def _spectra(y, n_fft=2048, hop=512):
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft)[::hop]
+    return np.fft.rfft(frames * np.hanning(n_fft), axis=1)
+
+
+def compare_spectra(y, ref, band, n_fft=2048):
+    """
+    (log-spectral distance in dB, SNR in dB) of *y* against *ref*, over the
+    STFT bins below *band* (a fraction of the Nyquist frequency).
+    """
+    n = min(len(y), len(ref))
+    if n < n_fft:
+        return float('nan'), float('nan')
+    keep = int(band * (n_fft // 2))
+    ours, theirs = _spectra(y[:n])[:, :keep], _spectra(ref[:n])[:, :keep]
+    diff = (10 * np.log10(np.abs(ours) ** 2 + 1e-10)
+            - 10 * np.log10(np.abs(theirs) ** 2 + 1e-10))
+    lsd = float(np.mean(np.sqrt(np.mean(diff ** 2, axis=1))))
+    noise = np.sum(np.abs(ours - theirs) ** 2)
+    snr = float(10 * np.log10(np.sum(np.abs(theirs) ** 2) / max(noise, 1e-20)))
+    return lsd, snr
+
+
+def measure(func, inputs, target_sr, repeat):
+    """Best-of-*repeat* speed and mean error of *func* over *inputs*."""
+    for _, y, sr in inputs[:1]:                      # import / plan warm-up
+        func(y, sr, target_sr)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [func(y, sr, target_sr) for _, y, sr in inputs]
+        best = min(best, time.perf_counter() - start)
+
+    audio_seconds = sum(len(y) / sr for _, y, sr in inputs)
+    errors, snrs = [], []
+    for (_, y, sr), out in zip(inputs, outputs):
+        # Below 90% of the lower Nyquist frequency: what both rates can hold
+        band = 0.9 * min(sr, target_sr) / target_sr
+        lsd, snr = compare_spectra(out, reference(y, sr, target_sr), band)
+        errors.append(lsd)
+        snrs.append(snr)
+    return {
+        'seconds': round(best, 6),
+        'x_realtime': round(audio_seconds / best, 1),
+        'spectral_error_db': round(float(np.nanmean(errors)), 3),
+        'snr_db': round(float(np.nanmean(snrs)), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark format_data resampling backends")
+    parser.add_argument("--rates", type=int, nargs="+", default=[48000, 44100, 16000],
+                        help="Source rates for the synthetic inputs")
+    parser.add_argument("--seconds", type=float, default=10.0,
+                        help="Length of each synthetic input")
+    parser.add_argument("--wavs", default=None,
+                        help="Benchmark on WAV files from this directory instead")
+    parser.add_argument("--limit", type=int, default=50, help="WAV files to use with --wavs")
+    parser.add_argument("--target-sr", type=int, default=TARGET_SR)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed passes; the fastest is reported")
+    parser.add_argument("--max-error-db", type=float, default=0.5,
+                        help="Spectral error a backend may have and still be recommended")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.wavs:
+        inputs = load_wavs(args.wavs, args.limit)
+        if not inputs:
+            parser.error(f"no .wav files in {args.wavs}")
+        groups = {}
+        for item in inputs:
+            groups.setdefault(item[2], []).append(item)
+    else:
+        groups = {sr: [(f'synthetic_{sr}', synthetic_signal(sr, args.seconds), sr)]
+                  for sr in args.rates}
+
+    # Block-wise polyphase with short blocks shows what long files pay.
+    backends = dict(RESAMPLERS, poly_blocks_1s=partial(resample_poly, block_seconds=1))
+
+    results = {
+        'config': {'target_sr': args.target_sr, 'repeat': args.repeat,
+                   'inputs': args.wavs or 'synthetic', 'seconds': args.seconds},
+        'environment': {'python': platform.python_version(),
+                        'platform': platform.platform(),
+                        'machine': platform.machine()},
+        'results': {},
+    }
+    print(f"=== Resampling Benchmark (target {args.target_sr} Hz) ===")
+    for sr, items in sorted(groups.items()):
+        print(f"\n  {sr} Hz -> {args.target_sr} Hz  ({len(items)} input(s))")
+        if sr == args.target_sr:
+            print("    rates match: every backend passes the audio through untouched")
+            continue
+        per_rate = {}
+        for name, func in backends.items():
+            r = measure(func, items, args.target_sr, args.repeat)
+            per_rate[name] = r
+            print(f"    {name:16s} {r['x_realtime']:>9,.0f}x realtime   "
+                  f"spectral error {r['spectral_error_db']:6.3f} dB   SNR {r['snr_db']:6.1f} dB")
+        good = {name: r for name, r in per_rate.items()
+                if r['spectral_error_db'] <= args.max_error_db}
+        if good:
+            pick = max(good, key=lambda name: good[name]['x_realtime'])
+            print(f"    -> fastest within {args.max_error_db} dB: {pick}")
+        else:
+            print(f"    -> no backend within {args.max_error_db} dB")
+        results['results'][str(sr)] = per_rate
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Near-duplicate detection for the dataset builder (see format_data.py --dedup).
+
+Two kinds of duplicates are found:
+  - transcripts: exact duplicates of the normalised text (whitespace and
+    punctuation ignored) share a key; near duplicates are found by MinHash
+    over character shingles with LSH banding, and confirmed when their
+    signatures agree on at least --dedup-threshold of the hashes (an
+    estimate of Jaccard similarity)
+  - audio: audio_fingerprint() turns the energy envelope of the decoded clip
+    into 63 bits; fingerprints sharing one of FP_BANDS bit bands are
+    confirmed by Hamming distance and a duration ratio.  Re-encoded,
+    resampled or re-gained copies of a take come out within a few bits.
+Only items landing in the same LSH bucket (and speaker) are ever compared,
+so the work grows with the number of utterances, not with its square.
+Duplicates are joined into groups; one utterance per group is kept
+(KEEP_POLICIES) and every other one is reported against it.
+"""
+import re
+
+import numpy as np
+
+FP_BITS = 63                 # sign of 63 energy differences between 64 segments
+FP_BANDS = 5                 # LSH bands of <= 13 bits; recall is certain below 5 differing bits
+MINHASH_PERM = 64
+MINHASH_BANDS = 16           # 16 bands x 4 rows: a Jaccard-0.8 pair is a candidate 99.98% of the time
+SHINGLE = 4                  # characters per shingle
+_BUCKET_PAIRWISE = 256       # larger buckets fall back to leader clustering
+
+KEEP_POLICIES = {
+    'first':    lambda item: item['fid'],
+    'longest':  lambda item: (-(item['duration'] or 0), item['fid']),
+    'shortest': lambda item: (item['duration'] or 0, item['fid']),
+}
+
+_PUNCT_RE = re.compile(r'[\s\W_]+')
+
+
+def audio_fingerprint(y, segments=FP_BITS + 1):
+    """63-bit energy-envelope fingerprint of *y* (0 for clips too short to have one)."""
+    if len(y) < segments:
+        return 0
+    energy = np.square(y[:len(y) // segments * segments], dtype=np.float64)
+    envelope = np.log10(energy.reshape(segments, -1).mean(axis=1) + 1e-10)
+    bits = np.diff(envelope) > 0
+    return int(np.packbits(np.concatenate(([False], bits))).view('>u8')[0])
+
+
+def text_key(text):
+    """Normalised text with punctuation and whitespace removed."""
+    return _PUNCT_RE.sub('', text)
+
+
+def _shingle_hashes(keys, shingle):
+    """
+    (32-bit hashes of every *shingle*-character window of every key, offset
+    of each key's first window).  Keys shorter than a shingle are padded, so
+    every key has at least one.  Rolling polynomial hash, all in numpy.
+    """
+    keys = [key.ljust(shingle, '\0') for key in keys]
+    lengths = np.array([len(key) for key in keys], dtype=np.int64)
+    codes = np.frombuffer(''.join(keys).encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+    windows = len(codes) - shingle + 1
+    hashes = np.zeros(windows, dtype=np.uint64)
+    for j in range(shingle):
+        hashes = hashes * np.uint64(1000003) + codes[j:j + windows]
+    # Windows that start in one key and end in the next are dropped
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)[:windows]
+    within = np.arange(windows) - starts <= np.repeat(lengths - shingle, lengths)[:windows]
+    hashes = (hashes[within] * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+    offsets = np.concatenate(([0], np.cumsum(lengths - shingle + 1)[:-1]))
+    return hashes, offsets
+
+
+def minhash_signatures(keys, num_perm=MINHASH_PERM, shingle=SHINGLE, seed=0, block=1024):
+    """[len(keys), num_perm] uint32 MinHash signatures of character shingles."""
+    # Multiply-shift hashing: (a * h + b) mod 2^64, top 32 bits, a odd
+    rng = np.random.default_rng(seed)
+    a = (rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1))[:, None]
+    b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None]
+    signatures = np.empty((len(keys), num_perm), dtype=np.uint32)
+    for start in range(0, len(keys), block):
+        hashes, offsets = _shingle_hashes(keys[start:start + block], shingle)
+        permuted = (a * hashes + b) >> np.uint64(32)
+        signatures[start:start + len(offsets)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+class _Groups:
+    """Union-find over item indices, remembering how each item was first joined."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.evidence = {}
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def join(self, i, j, reason):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+            self.evidence.setdefault(i, (reason, j))
+            self.evidence.setdefault(j, (reason, i))
+
+
+def _popcount(x):
+    """Set bits per element of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):                     # numpy >= 2.0
+        return np.bitwise_count(x)
+    return np.unpackbits(x.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def _candidate_pairs(keys, max_pairwise=_BUCKET_PAIRWISE):
+    """
+    Rows of *keys* that share a key: (first rows, second rows) of every pair
+    in buckets of up to *max_pairwise* rows, and the row arrays of the
+    bigger buckets.  Pairs are enumerated by stepping through the grouped
+    order once per distance d, each step vectorised over all buckets.
+    """
+    keys = np.ascontiguousarray(keys)
+    flat = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind='stable')
+    bucket = inverse[order]
+    size = counts[bucket]
+
+    firsts, seconds = [], []
+    positions = np.flatnonzero((size > 1) & (size <= max_pairwise))
+    distance = 1
+    while len(positions):
+        positions = positions[positions + distance < len(order)]
+        positions = positions[bucket[positions + distance] == bucket[positions]]
+        firsts.append(order[positions])
+        seconds.append(order[positions + distance])
+        distance += 1
+    big = [order[bucket == b] for b in np.flatnonzero(counts > max_pairwise)]
+    empty = np.zeros(0, dtype=np.int64)
+    return (np.concatenate(firsts) if firsts else empty,
+            np.concatenate(seconds) if seconds else empty, big)
+
+
+def _join_similar(groups, keys, similar, reason, index):
+    """
+    Join the rows of *keys* (item index[row]) that share a key and that
+    *similar(rows, rows)* accepts pairwise.  Buckets too big to compare
+    pairwise are matched against one leader per group found so far, which
+    stays linear when the bucket is mostly one group.
+    """
+    firsts, seconds, big = _candidate_pairs(keys)
+    for start in range(0, len(firsts), 1 << 16):
+        a, b = firsts[start:start + (1 << 16)], seconds[start:start + (1 << 16)]
+        hits = similar(a, b)
+        for i, j in zip(a[hits], b[hits]):
+            groups.join(index[i], index[j], reason)
+    for bucket in big:
+        leaders = []
+        for i in bucket:
+            if leaders:
+                hits = np.flatnonzero(similar(np.full(len(leaders), i), np.array(leaders)))
+                if len(hits):
+                    groups.join(index[leaders[hits[0]]], index[i], reason)
+                    continue
+            leaders.append(i)
+
+
+def find_duplicates(items, text=True, audio=True, threshold=0.8, max_bits=4,
+                    duration_ratio=0.98, keep='first'):
+    """
+    Group duplicates among *items* (dicts with fid, group, text, fingerprint,
+    duration; only items of the same group — the speaker — are compared).
+    Returns [(removed item, kept item, reason, matched item)]: reason ("exact
+    text", "text" or "audio") and matched item are the match that pulled the
+    removed item into its group, which may be another member than the kept one.
+    """
+    n = len(items)
+    groups = _Groups(n)
+    speaker = {name: k for k, name in enumerate(sorted({item['group'] for item in items}))}
+    speakers = np.array([speaker[item['group']] for item in items], dtype=np.int64)
+
+    if text and n:
+        keys = [text_key(item['text']) for item in items]
+        first = {}
+        for i, key in enumerate(keys):
+            j = first.setdefault((speakers[i], key), i)
+            if j != i:
+                groups.join(j, i, "exact text")
+
+        # Near duplicates among the distinct texts only
+        distinct = np.array(sorted(set(first.values())), dtype=np.int64)
+        signatures = minhash_signatures([keys[i] for i in distinct])
+        rows = MINHASH_PERM // MINHASH_BANDS
+
+        def similar(a, b):
+            return (signatures[a] == signatures[b]).mean(axis=1) >= threshold
+
+        for band in range(MINHASH_BANDS):
+            band_keys = np.column_stack((speakers[distinct],
+                                         signatures[:, band * rows:(band + 1) * rows]))
+            _join_similar(groups, band_keys, similar, "text", distinct)
+
+    if audio and n:
+        fingerprints = np.array([item['fingerprint'] or 0 for item in items], dtype=np.uint64)
+        durations = np.array([item['duration'] or 0.0 for item in items])
+        usable = np.flatnonzero(fingerprints != 0)
+        band_bits = -(-FP_BITS // FP_BANDS)
+
+        def similar(a, b):
+            a, b = usable[a], usable[b]
+            bits = _popcount(fingerprints[a] ^ fingerprints[b])
+            ratio = (np.minimum(durations[a], durations[b]) /
+                     np.maximum(np.maximum(durations[a], durations[b]), 1e-9))
+            return (bits <= max_bits) & (ratio >= duration_ratio)
+
+        for band in range(FP_BANDS):
+            values = (fingerprints[usable] >> np.uint64(band * band_bits)) & \
+                np.uint64((1 << band_bits) - 1)
+            band_keys = np.column_stack((speakers[usable], values.astype(np.int64)))
+            _join_similar(groups, band_keys, similar, "audio", usable)
+
+    members = {}
+    for i in range(n):
+        members.setdefault(groups.find(i), []).append(i)
+    removed = []
+    order = KEEP_POLICIES[keep]
+    for group in members.values():
+        if len(group) > 1:
+            kept = min(group, key=lambda i: order(items[i]))
+            for i in sorted(group, key=lambda i: items[i]['fid']):
+                if i != kept:
+                    reason, matched = groups.evidence[i]
+                    removed.append((items[i], items[kept], reason, items[matched]))
+    return removed
@@ -1,7 +1,15 @@
 import os
-import urllib.request
 import zipfile
 import sys
+import time
+import shutil
+import argparse
+import tempfile
+import concurrent.futures
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from downloader import download_file
+from openslr import read_line_index, select_speakers, zip_mtime_ns
 
 DATA_DIR = "data"
 DATASET_URL = "https://www.openslr.org/resources/64/mr_in_female.zip"
@@ -9,50 +17,138 @@ LINE_INDEX_URL = "https://www.openslr.org/resources/64/line_index.tsv"
 ZIP_FILE = os.path.join(DATA_DIR, "mr_in_female.zip")
 EXTRACT_DIR = os.path.join(DATA_DIR, "mr_in_female")
 
-def download_file(url, path):
-    if os.path.exists(path):
-        print(f"File already exists: {path}")
-        return True
-    
-    print(f"Downloading {url} to {path}...")
-    try:
-        urllib.request.urlretrieve(url, path, reporthook=progress_hook)
-        print("\nDownload complete.")
-        return True
-    except Exception as e:
-        print(f"\nDownload failed: {e}")
-        return False
-
-def progress_hook(block_num, block_size, total_size):
-    if total_size > 0:
-        percent = int(block_num * block_size * 100 / total_size)
-        sys.stdout.write(f"\rDownloading: {percent}%")
-        sys.stdout.flush()
-
 def extract_zip(zip_path, extract_to):
+    """extractall; returns (bytes written, seconds)."""
     print(f"Extracting {zip_path} to {extract_to}...")
+    start = time.perf_counter()
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
         zip_ref.extractall(extract_to)
+        written = sum(info.file_size for info in zip_ref.infolist())
     print("Extraction complete.")
+    return written, time.perf_counter() - start
+
+def _extract_members(zip_path, items):
+    """Worker: write each (member, dest) of *items*; returns the bytes written."""
+    written = 0
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        for name, dest in items:
+            info = zip_ref.getinfo(name)
+            with zip_ref.open(info) as src, open(dest + ".tmp", 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            # The member's date, so format_data sees the same file as with --from-zip
+            mtime = zip_mtime_ns(info)
+            os.utime(dest + ".tmp", ns=(mtime, mtime))
+            os.replace(dest + ".tmp", dest)
+            written += info.file_size
+    return written
+
+def extract_selected(zip_path, extract_to, fids, workers, chunk_size=64):
+    """
+    Extract the WAV members of *fids* (matched by file name, wherever they
+    sit in the zip; every WAV if None) into *extract_to*, on *workers*
+    processes.  Files already
+    there with the member's size and date are left alone.  Returns
+    (extracted, already present, not in the zip, bytes written, seconds).
+    """
+    start = time.perf_counter()
+    wanted = None if fids is None else {fid if fid.endswith('.wav') else fid + ".wav"
+                                        for fid in fids}
+    todo, present = [], 0
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        for info in zip_ref.infolist():
+            name = os.path.basename(info.filename)
+            if wanted is None:
+                if info.is_dir() or not name.endswith('.wav'):
+                    continue
+            elif name not in wanted:
+                continue
+            else:
+                wanted.discard(name)
+            dest = os.path.join(extract_to, name)
+            if (os.path.exists(dest) and os.path.getsize(dest) == info.file_size
+                    and os.stat(dest).st_mtime_ns == zip_mtime_ns(info)):
+                present += 1
+            else:
+                todo.append((info.filename, dest))
+    os.makedirs(extract_to, exist_ok=True)
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    written = 0
+    if chunks:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            written = sum(executor.map(_extract_members, [zip_path] * len(chunks), chunks))
+    absent = len(wanted) if wanted is not None else 0
+    return len(todo), present, absent, written, time.perf_counter() - start
 
 def main():
+    parser = argparse.ArgumentParser(description="Download OpenSLR-64 (Marathi)")
+    parser.add_argument("--segments", type=int, default=4,
+                        help="Parallel ranged requests (1 = a single stream)")
+    parser.add_argument("--extract", choices=("selected", "all", "none"), default="selected",
+                        help="Extract only the speakers format_data.py will use (default), "
+                             "the whole zip, or nothing (format_data.py --from-zip)")
+    speakers = parser.add_mutually_exclusive_group()
+    speakers.add_argument("--top", type=int, default=None, metavar="N",
+                          help="Extract the N speakers with the most utterances (default: 1)")
+    speakers.add_argument("--speaker", nargs="+", default=None, metavar="ID",
+                          help="Extract these speakers")
+    speakers.add_argument("--min-utterances", type=int, default=None, metavar="K",
+                          help="Extract every speaker with at least K utterances")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Extraction processes (default: all cores)")
+    parser.add_argument("--compare-extractall", action="store_true",
+                        help="Also time a full extractall into a scratch directory")
+    args = parser.parse_args()
+
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
     
-    # Download Zip
-    if download_file(DATASET_URL, ZIP_FILE):
-        # Extract
-        if not os.path.exists(EXTRACT_DIR):
-             # The zip might contain a folder or just files. 
-             # Based on README: "Place OpenSLR-64 files in data/mr_in_female/"
-             # Let's extract to data/mr_in_female?
-             # Usually openslr zips contain the files directly or a folder.
-             # Let's verify content if possible, or just extract to mr_in_female
-             os.makedirs(EXTRACT_DIR, exist_ok=True)
-             extract_zip(ZIP_FILE, EXTRACT_DIR)
-    
-    # Download line_index.tsv
-    download_file(LINE_INDEX_URL, os.path.join(DATA_DIR, "line_index.tsv"))
+    # Download Zip (resumed if interrupted, verified against checksums.sha256)
+    if not download_file(DATASET_URL, ZIP_FILE, segments=args.segments):
+        sys.exit(1)
+
+    # Download line_index.tsv (it decides which members are extracted)
+    line_index = os.path.join(DATA_DIR, "line_index.tsv")
+    if not download_file(LINE_INDEX_URL, line_index):
+        sys.exit(1)
+
+    if args.extract == "none":
+        print("Not extracting; build with 'python scripts/format_data.py --from-zip'.")
+        return
+    if args.extract == "all":
+        # Same skip-if-present pass as below, so a re-run only fills in what is missing
+        fids = None
+        print(f"Extracting every utterance to {EXTRACT_DIR}...")
+    else:
+        rows, speaker_counts = read_line_index(line_index)
+        try:
+            selected = select_speakers(speaker_counts, args.top, args.speaker, args.min_utterances)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        selected_set = set(selected)
+        fids = [fid for fid, _, speaker in rows if speaker in selected_set]
+        print(f"Extracting {len(fids)} utterances of speaker(s) "
+              f"{', '.join(selected)} to {EXTRACT_DIR}...")
+    extracted, present, absent, written, seconds = extract_selected(
+        ZIP_FILE, EXTRACT_DIR, fids, args.workers)
+    with zipfile.ZipFile(ZIP_FILE) as zip_ref:
+        total = sum(info.file_size for info in zip_ref.infolist())
+
+    print(f"\n=== Extraction ===")
+    print(f"  Extracted:    {extracted} files ({present} already present, "
+          f"{absent} not in the zip)")
+    print(f"  Written:      {written / 2**20:.1f} MB of {total / 2**20:.1f} MB in the zip "
+          f"({written / max(total, 1):.1%}) in {seconds:.2f}s, {args.workers} workers")
+    if args.compare_extractall:
+        scratch = tempfile.mkdtemp(dir=DATA_DIR)
+        try:
+            full_written, full_seconds = extract_zip(ZIP_FILE, scratch)
+        finally:
+            shutil.rmtree(scratch)
+        print(f"  extractall:   {full_written / 2**20:.1f} MB in {full_seconds:.2f}s "
+              f"({full_seconds / max(seconds, 1e-9):.1f}x the time)")
+    if fids is not None:
+        print(f"  Other speakers: add --top N / --speaker ID, or --extract all")
 
 if __name__ == "__main__":
     main()
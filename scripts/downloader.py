@@ -0,0 +1,537 @@
+"""
+Shared downloader for download_dataset.py and download_checkpoint.py.
+
+urlretrieve took any existing file as complete and restarted interrupted
+downloads from zero.  download_file() instead:
+  - downloads into <path>.part and renames it over <path> only once it is
+    complete and verified (os.replace, atomic on the same filesystem)
+  - resumes a .part file with an HTTP Range request; If-Range with the
+    server's ETag / Last-Modified makes a changed remote file start over
+    instead of being spliced onto the old bytes
+  - optionally fetches --segments byte ranges in parallel threads; segment
+    progress is kept in <path>.part.json, so those resume too
+  - retries a dropped connection from where it stopped (RETRIES times)
+  - verifies SHA-256 while streaming (single stream; segmented downloads
+    are hashed in one read pass at the end) against a manifest in
+    sha256sum format (MANIFEST: "<hex>  <file name>" lines)
+  - checks a file that already exists: against its manifest hash, or
+    against the remote size when there is none.  A short file is resumed,
+    a full-size one with the wrong hash downloaded again from byte 0; a
+    resumed file that then fails its hash is also restarted from byte 0
+Files without a manifest entry get one after their first complete
+download, so any later truncation or corruption is caught.
+Servers that ignore Range (200 instead of 206) still work, from zero.
+
+Usage:
+    python scripts/downloader.py URL PATH [--sha256 HEX] [--segments 4]
+    python scripts/downloader.py selftest       # against a local http.server
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MANIFEST = os.path.join(PROJECT_ROOT, "checksums.sha256")
+
+CHUNK = 1 << 20
+MIN_SEGMENT = 4 << 20          # files smaller than this are fetched in one stream
+STATE_EVERY = 16 << 20         # persist segment progress every this many bytes
+RETRIES = 5
+TIMEOUT = 60
+
+_NETWORK_ERRORS = (urllib.error.URLError, http.client.HTTPException, OSError)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _retry(error, attempt):
+    """Sleep before retry *attempt*, or raise DownloadError if it should not happen."""
+    if isinstance(error, urllib.error.HTTPError) and error.code < 500:
+        raise DownloadError(str(error))
+    if attempt > RETRIES:
+        raise DownloadError(f"{error} (after {RETRIES} retries; rerun to resume)")
+    time.sleep(min(2 ** attempt, 30) * 0.1)
+
+
+# =============================================================================
+# Manifest
+# =============================================================================
+
+def _manifest_entry(line):
+    """(sha256 hex, file name) of a manifest line, or None for blank, comment or malformed lines."""
+    fields = line.strip().split(None, 1)
+    if len(fields) != 2 or fields[0].startswith('#'):
+        return None
+    return fields[0].lower(), fields[1].strip().lstrip('*')
+
+
+def load_manifest(path=MANIFEST):
+    """{file name: sha256 hex} from a sha256sum-style file ('#' comments allowed)."""
+    hashes = {}
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = _manifest_entry(line)
+                if entry:
+                    hashes[entry[1]] = entry[0]
+    return hashes
+
+
+def record_hash(path, name, digest):
+    """Add or replace *name*'s entry in the manifest at *path*; other lines are kept as they are."""
+    lines = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line.rstrip('\n') for line in f
+                     if (_manifest_entry(line) or (None, None))[1] != name]
+    lines.append(f"{digest}  {name}")
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def file_sha256(path, limit=None):
+    """SHA-256 object over the first *limit* bytes of *path* (all of it by default)."""
+    digest = hashlib.sha256()
+    remaining = os.path.getsize(path) if limit is None else limit
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(CHUNK, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+
+# =============================================================================
+# HTTP
+# =============================================================================
+
+class _Progress:
+    """Thread-safe "\\r  Downloading: 42% (x/y MB, z MB/s)" line."""
+
+    def __init__(self, total, done=0):
+        self.total, self.done, self.start_done = total, done, done
+        self.start = time.perf_counter()
+        self.last_percent = -1
+        self.lock = threading.Lock()
+
+    def add(self, n):
+        with self.lock:
+            self.done += n
+            if not self.total:
+                return
+            percent = min(int(self.done * 100 / self.total), 100)
+            if percent != self.last_percent:
+                self.last_percent = percent
+                rate = (self.done - self.start_done) / max(time.perf_counter() - self.start, 1e-9)
+                sys.stdout.write(f"\r  Downloading: {percent}% ({self.done / 2**20:.1f}/"
+                                 f"{self.total / 2**20:.1f} MB, {rate / 2**20:.1f} MB/s)")
+                sys.stdout.flush()
+
+
+def _open(url, start=None, end=None, validator=None):
+    headers = {'User-Agent': 'MarathiTTSv1-downloader'}
+    if start is not None:
+        headers['Range'] = f"bytes={start}-" + ("" if end is None else str(end))
+        if validator:
+            headers['If-Range'] = validator
+    return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=TIMEOUT)
+
+
+def probe(url):
+    """
+    (final URL after redirects, size or None, accepts ranges, validator) from
+    a one-byte ranged GET; HEAD is not used because some hosts reject it.
+    """
+    with _open(url, 0, 0) as response:
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        if response.status == 206:
+            content_range = response.headers.get('Content-Range', '')
+            total = content_range.rsplit('/', 1)[-1]
+            return (response.geturl(), int(total) if total.isdigit() else None, True, validator)
+        length = response.headers.get('Content-Length')
+        return response.geturl(), int(length) if length else None, False, validator
+
+
+def _fetch_stream(url, part, size, ranges, validator, digest, progress):
+    """
+    Append to *part* from its current length, hashing into *digest* (which
+    already covers the existing bytes), retrying dropped connections.
+    Returns the digest, which is new if the server made us start over.
+    """
+    attempt = 0
+    while True:
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if size is not None and offset >= size:
+            return digest
+        try:
+            with _open(url, offset if ranges and offset else None, None, validator) as response:
+                if offset and response.status != 206:
+                    # Range ignored or the file changed (If-Range): start over
+                    offset, digest = 0, hashlib.sha256()
+                    progress.add(-progress.done)
+                with open(part, 'r+b' if offset else 'wb') as f:
+                    f.seek(offset)
+                    f.truncate()
+                    for block in iter(lambda: response.read(CHUNK), b''):
+                        f.write(block)
+                        digest.update(block)
+                        progress.add(len(block))
+            if size is None or os.path.getsize(part) >= size:
+                return digest
+            raise ConnectionError("connection closed early")
+        except _NETWORK_ERRORS as e:
+            attempt += 1
+            _retry(e, attempt)
+
+
+def _save_state(state_path, state):
+    tmp = state_path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path)
+
+
+def _fetch_segments(url, part, size, validator, segments, progress):
+    """Fill *part* (preallocated to *size*) from parallel ranged requests."""
+    state_path = part + ".json"
+    state = None
+    if os.path.exists(state_path) and os.path.exists(part):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('size') != size or state.get('validator') != validator:
+            state = None                          # remote file changed
+    if state is None:
+        bounds = [size * i // segments for i in range(segments + 1)]
+        state = {'size': size, 'validator': validator,
+                 'segments': [[bounds[i], bounds[i + 1], 0] for i in range(segments)]}
+        with open(part, 'wb') as f:
+            f.truncate(size)
+        _save_state(state_path, state)
+    progress.add(sum(done for _, _, done in state['segments']) - progress.done)
+    lock = threading.Lock()
+
+    def fetch(segment):
+        start, end, _ = segment
+        attempt, unsaved = 0, 0
+        while segment[2] < end - start:
+            try:
+                with _open(url, start + segment[2], end - 1, validator) as response, \
+                        open(part, 'r+b') as f:
+                    if response.status != 206:
+                        raise DownloadError("server stopped honouring Range requests")
+                    f.seek(start + segment[2])
+                    for block in iter(lambda: response.read(min(CHUNK, end - start - segment[2])), b''):
+                        f.write(block)
+                        with lock:
+                            segment[2] += len(block)
+                            unsaved += len(block)
+                            if unsaved >= STATE_EVERY:
+                                f.flush()
+                                _save_state(state_path, state)
+                                unsaved = 0
+                        progress.add(len(block))
+                        if segment[2] >= end - start:
+                            break
+                if segment[2] < end - start:
+                    raise ConnectionError("connection closed early")
+            except _NETWORK_ERRORS as e:
+                attempt += 1
+                _retry(e, attempt)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(state['segments'])) as executor:
+            for future in [executor.submit(fetch, s) for s in state['segments']]:
+                future.result()
+    finally:
+        with lock:
+            _save_state(state_path, state)
+
+
+# =============================================================================
+# Public API
+# =============================================================================
+
+def download_file(url, path, sha256=None, manifest=MANIFEST, segments=1, record=True):
+    """
+    Make *path* a verified copy of *url*; True on success.  The expected
+    hash is *sha256*, else the manifest entry for the file's name.  With
+    *record*, a file without one gets its hash added to the manifest.
+    """
+    name = os.path.basename(path)
+    expected = (sha256 or load_manifest(manifest).get(name) or '').lower() or None
+    part = path + ".part"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    try:
+        remote = None
+        if os.path.exists(path):
+            if expected:
+                if file_sha256(path).hexdigest() == expected:
+                    print(f"File already exists and matches its SHA-256: {path}")
+                    return True
+                print(f"Existing file does not match its SHA-256, repairing: {path}")
+                remote = probe(url)
+                if remote[1] is None or os.path.getsize(path) >= remote[1]:
+                    os.remove(path)               # complete but bad: nothing to resume
+            else:
+                try:
+                    remote = probe(url)
+                except _NETWORK_ERRORS as e:
+                    print(f"File already exists: {path} (could not check its size: {e})")
+                    return True
+                if remote[1] is None or os.path.getsize(path) == remote[1]:
+                    print(f"File already exists: {path}")
+                    if record and manifest and remote[1] is not None:
+                        record_hash(manifest, name, file_sha256(path).hexdigest())
+                    return True
+                print(f"Existing file is {os.path.getsize(path)} bytes, expected "
+                      f"{remote[1]}; resuming: {path}")
+            if os.path.exists(path):
+                if os.path.exists(part + ".json"):
+                    os.remove(part + ".json")
+                os.replace(path, part)
+
+        final_url, size, ranges, validator = remote or probe(url)
+        if os.path.exists(part) and size is not None and os.path.getsize(part) > size \
+                and not os.path.exists(part + ".json"):
+            os.remove(part)
+        print(f"Downloading {url}")
+        print(f"  Dest: {path}" + (f" ({size / 2**20:.1f} MB)" if size else ""))
+
+        while True:
+            # Bytes kept from before this run: a bad hash may be their fault
+            resumed = os.path.exists(part) and os.path.getsize(part) > 0
+            if segments > 1 and ranges and size and size >= MIN_SEGMENT:
+                progress = _Progress(size)
+                _fetch_segments(final_url, part, size, validator, segments, progress)
+                print()
+                digest = file_sha256(part)
+            else:
+                if os.path.exists(part + ".json"):        # segmented .part: not a prefix
+                    os.remove(part + ".json")
+                    os.remove(part)
+                offset = os.path.getsize(part) if os.path.exists(part) and ranges else 0
+                if offset:
+                    print(f"  Resuming at {offset / 2**20:.1f} MB")
+                elif os.path.exists(part):
+                    os.remove(part)
+                progress = _Progress(size, offset)
+                digest = _fetch_stream(final_url, part, size, ranges, validator,
+                                       file_sha256(part, offset) if offset else hashlib.sha256(),
+                                       progress)
+                print()
+
+            if size is not None and os.path.getsize(part) != size:
+                raise DownloadError(f"got {os.path.getsize(part)} bytes, expected {size}")
+            actual = digest.hexdigest()
+            if not expected or actual == expected:
+                break
+            for leftover in (part, part + ".json"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            if not resumed:
+                raise DownloadError(f"SHA-256 mismatch: got {actual}, expected {expected}")
+            print("  SHA-256 mismatch in the resumed file; downloading again from byte 0")
+        os.replace(part, path)
+        if os.path.exists(part + ".json"):
+            os.remove(part + ".json")
+        if not expected and record and manifest:
+            record_hash(manifest, name, actual)
+        print(f"  Download complete (SHA-256 {actual}"
+              f"{', verified' if expected else ', recorded' if record and manifest else ''}).")
+        return True
+    except (DownloadError, *_NETWORK_ERRORS) as e:
+        print(f"\n  Download failed: {e}")
+        return False
+
+
+# =============================================================================
+# Self-test against a local http.server
+# =============================================================================
+
+def _make_handler(directory, cut_after=None, ranges=True):
+    """
+    SimpleHTTPRequestHandler serving *directory* with single-range support,
+    an ETag, and optionally every first response per path cut after
+    *cut_after* bytes (a dropped connection).
+    """
+    from http.server import SimpleHTTPRequestHandler
+
+    cut = set()
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.translate_path(self.path)
+            if not os.path.isfile(path):
+                self.send_error(404)
+                return
+            size = os.path.getsize(path)
+            etag = f'"{size}-{int(os.path.getmtime(path))}"'
+            start, end, status = 0, size - 1, 200
+            requested = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            if ranges and requested and (not if_range or if_range == etag):
+                first, _, last = requested.split('=', 1)[1].partition('-')
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+                status = 206
+            self.send_response(status)
+            self.send_header('Content-Length', str(end - start + 1))
+            self.send_header('ETag', etag)
+            if ranges:
+                self.send_header('Accept-Ranges', 'bytes')
+            if status == 206:
+                self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            limit = end - start + 1
+            if cut_after is not None and end - start > 0 and (self.path, start) not in cut:
+                cut.add((self.path, start))
+                limit = min(limit, cut_after)
+            with open(path, 'rb') as f:
+                f.seek(start)
+                try:
+                    self.wfile.write(f.read(limit))
+                except (BrokenPipeError, ConnectionResetError):
+                    return                        # client took what it wanted (probe)
+            if limit < end - start + 1:
+                self.close_connection = True
+
+    return Handler
+
+
+def self_test():
+    import tempfile
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    global RETRIES
+    failures = 0
+
+    def check(label, condition):
+        nonlocal failures
+        failures += not condition
+        print(f"  [{'PASS' if condition else 'FAIL'}] {label}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        served = os.path.join(tmp, "served")
+        os.makedirs(served)
+        payload = os.urandom(MIN_SEGMENT * 2 + 12345)
+        with open(os.path.join(served, "data.bin"), 'wb') as f:
+            f.write(payload)
+        good = hashlib.sha256(payload).hexdigest()
+        manifest = os.path.join(tmp, "checksums.sha256")
+
+        def run(label, handler, dest, **kwargs):
+            server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_address[1]}/data.bin"
+            print(f"--- {label}")
+            try:
+                return download_file(url, os.path.join(tmp, dest), **kwargs)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        def content(dest):
+            with open(os.path.join(tmp, dest), 'rb') as f:
+                return f.read()
+
+        ok = run("single stream", _make_handler(served), "a.bin", manifest=manifest)
+        check("single stream download", ok and content("a.bin") == payload)
+        check("hash recorded in manifest", load_manifest(manifest).get("a.bin") == good)
+
+        ok = run("dropped connection", _make_handler(served, cut_after=3 << 20), "b.bin",
+                 sha256=good)
+        check("resumed after a dropped connection", ok and content("b.bin") == payload)
+
+        ok = run("segmented", _make_handler(served, cut_after=1 << 20), "c.bin",
+                 sha256=good, segments=4)
+        check("4 segments, each dropped once", ok and content("c.bin") == payload)
+
+        ok = run("no Range support", _make_handler(served, ranges=False), "d.bin",
+                 sha256=good, segments=4)
+        check("server without Range support", ok and content("d.bin") == payload)
+
+        ok = run("wrong checksum", _make_handler(served), "e.bin", sha256="0" * 64)
+        check("checksum mismatch rejected, nothing left behind",
+              not ok and not os.path.exists(os.path.join(tmp, "e.bin"))
+              and not os.path.exists(os.path.join(tmp, "e.bin.part")))
+
+        with open(os.path.join(tmp, "a.bin"), 'r+b') as f:
+            f.truncate(len(payload) // 3)
+        ok = run("truncated existing file", _make_handler(served), "a.bin", manifest=manifest)
+        check("truncated file detected and completed", ok and content("a.bin") == payload)
+
+        with open(os.path.join(tmp, "a.bin"), 'r+b') as f:
+            f.seek(len(payload) // 2)
+            f.write(b'\0' * 4096)
+        ok = run("corrupted full-size file", _make_handler(served), "a.bin", manifest=manifest)
+        check("corrupted file re-downloaded from byte 0 in one run",
+              ok and content("a.bin") == payload)
+
+        with open(os.path.join(tmp, "a.bin"), 'r+b') as f:
+            f.seek(1000)
+            f.write(b'\0' * 4096)
+            f.truncate(len(payload) // 2)
+        ok = run("truncated file, corrupted prefix", _make_handler(served), "a.bin",
+                 manifest=manifest)
+        check("bad resumed prefix re-downloaded from byte 0 in one run",
+              ok and content("a.bin") == payload)
+
+        with open(manifest, 'a', encoding='utf-8') as f:
+            f.write("deadbeef\n   \n")
+        record_hash(manifest, "g.bin", good)
+        check("malformed manifest lines skipped",
+              load_manifest(manifest).get("g.bin") == good
+              and load_manifest(manifest).get("a.bin") == good)
+
+        RETRIES, saved = 0, RETRIES
+        try:
+            ok = run("interrupted segmented run", _make_handler(served, cut_after=1 << 20),
+                     "f.bin", sha256=good, segments=3)
+            state = os.path.exists(os.path.join(tmp, "f.bin.part.json"))
+        finally:
+            RETRIES = saved
+        ok = run("rerun", _make_handler(served), "f.bin", sha256=good, segments=3)
+        check("segmented .part resumed by a second run",
+              state and ok and content("f.bin") == payload)
+
+    print(f"\n{'All tests passed.' if not failures else f'{failures} test(s) FAILED.'}")
+    return failures == 0
+
+
+def main():
+    if sys.argv[1:] == ['selftest']:
+        sys.exit(0 if self_test() else 1)
+    parser = argparse.ArgumentParser(description="Resumable, verified download")
+    parser.add_argument("url")
+    parser.add_argument("path")
+    parser.add_argument("--sha256", default=None, help="Expected SHA-256 (default: manifest)")
+    parser.add_argument("--manifest", default=MANIFEST, help="sha256sum-style manifest")
+    parser.add_argument("--segments", type=int, default=1, help="Parallel ranged requests")
+    args = parser.parse_args()
+    if not download_file(args.url, args.path, args.sha256, args.manifest, args.segments):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
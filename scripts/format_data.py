@@ -5,31 +5,108 @@ FIXED: Relative paths (no hardcoded Windows paths)
 FIXED: normalize_marathi import (uses sys.path)
 FIXED: Re-run bug (cleans output dir on each run)
 FIXED: MAX_RMS threshold (0.5 instead of 1.0)
+PERF : Audio stage streams chunks through a bounded process (or thread) pool;
+       --workers defaults to the core count, files/sec reported at the end
+NEW  : Incremental builds — processed audio and a manifest (source size /
+       mtime / SHA-256, parameters, duration, RMS, outcome) persist in
+       data/processed_audio; reruns only decode new or changed files and an
+       interrupted build resumes.  --rebuild starts from scratch.  Stored
+       audio is only dropped when its row leaves line_index.tsv or its
+       source file disappears, not when a build leaves the row out.
+PERF : Header-only prefilter — frame count / sample rate read in parallel
+       threads; out-of-range or unreadable files are rejected before any
+       sample data is decoded.  Rejections are reported by reason.
+PERF : Pluggable resampling (RESAMPLERS: soxr — librosa.load's default —
+       or scipy polyphase, block-wise for long files); no work at all when
+       the source is already at TARGET_SR.  Audio is read with soundfile, so
+       workers no longer import librosa.
+NEW  : Leading/trailing silence trimmed (vectorised framewise energy,
+       --trim-db / --trim-pad / --no-trim) before the duration and RMS
+       filters; the hours removed are reported.
+NEW  : --shards also packs the dataset into memory-mappable int16 shards
+       (see audio_shards.py) next to wavs/ and metadata.csv.
+NEW  : lengths.tsv (id, duration in seconds, normalised text length) is
+       written next to metadata.csv for length-bucketed batching
+       (see batch_buckets.py).
+NEW  : Several speakers in one pass — --top N, --speaker ID ..., or
+       --min-utterances K select speakers from one read of line_index.tsv;
+       their audio goes through the same parallel pipeline and each gets its
+       own LJSpeech directory (OUTPUT_DIR/<speaker>/), or with --multi-speaker
+       one metadata.csv in Piper's id|speaker|text format.  Changing the
+       selection only changes which stored clips are linked into wavs/.
+NEW  : --dedup text|audio|both drops repeated prompts and re-recorded takes
+       per speaker: exact and MinHash near-duplicate normalised transcripts,
+       and near-identical audio by an energy-envelope fingerprint taken in
+       the decode pass (see dedup.py).  --dedup-keep picks the survivor;
+       removed pairs go to duplicates.tsv.
+NEW  : --max-rate-z drops clips whose speaking rate (characters and a
+       phoneme proxy per second, vectorised over all transcripts) is an
+       outlier for their speaker by robust median/MAD z-score — truncated
+       audio or the wrong transcript.  A histogram is printed and the
+       rejected ids go to rate_outliers.tsv (see speaking_rate.py).
+PERF : Text first — every transcript is normalised (cache misses in
+       parallel) and validated (empty, non-Devanagari leftovers — also
+       Latin words / symbols the normaliser's character filter would
+       silently delete — length limits) before any audio is scheduled, so rejected rows cost no
+       decoding or disk.  Rejections from every stage are reported together
+       and listed in rejections.tsv.
+NEW  : --from-zip decodes source WAVs straight out of mr_in_female.zip (each
+       worker opens the zip itself; a member is read once for hash and
+       decode), so nothing has to be extracted.  Incremental builds see the
+       same size / date as for extracted files.
 """
+import io
 import os
+import re
 import sys
-import csv
+import time
 import shutil
+import struct
+import hashlib
+import sqlite3
+import zipfile
+import argparse
 import numpy as np
 from tqdm import tqdm
 import concurrent.futures
-from collections import Counter
+from itertools import islice
+from collections import Counter, namedtuple
 
 # Fix import path so normalize_marathi can be found
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, SCRIPT_DIR)
-from normalize_marathi import normalize_text
+from normalize_marathi import NormalizationCache, dropped_chars, profile_normalizer
+from audio_shards import ShardDataset, ljspeech_to_shards
+from dedup import KEEP_POLICIES, audio_fingerprint, find_duplicates
+from speaking_rate import histogram, rate_outliers
+from openslr import read_line_index, select_speakers, zip_mtime_ns
 
 # Paths — relative to project root
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DATA_ROOT = os.path.join(PROJECT_ROOT, "data")
 SOURCE_WAVS = os.path.join(DATA_ROOT, "mr_in_female")
+SOURCE_ZIP = os.path.join(DATA_ROOT, "mr_in_female.zip")      # --from-zip
 TRANSCRIPT_FILE = os.path.join(DATA_ROOT, "line_index.tsv")
 
 # Output for filtered dataset
 OUTPUT_DIR = os.path.join(DATA_ROOT, "ljspeech_filtered")
 OUTPUT_WAVS = os.path.join(OUTPUT_DIR, "wavs")
 OUTPUT_METADATA = os.path.join(OUTPUT_DIR, "metadata.csv")
+OUTPUT_SHARDS = os.path.join(OUTPUT_DIR, "shards")
+OUTPUT_LENGTHS = os.path.join(OUTPUT_DIR, "lengths.tsv")
+OUTPUT_DUPLICATES = os.path.join(OUTPUT_DIR, "duplicates.tsv")
+OUTPUT_RATE_OUTLIERS = os.path.join(OUTPUT_DIR, "rate_outliers.tsv")
+OUTPUT_REJECTIONS = os.path.join(OUTPUT_DIR, "rejections.tsv")
+
+# Normalised transcripts survive the output-dir cleanup; stale entries are
+# dropped automatically when normalize_marathi's rules change.
+NORMALIZE_CACHE = os.path.join(DATA_ROOT, "normalize_cache.sqlite")
+
+# Resampled, accepted audio (one <fid>.wav per utterance) and the build
+# manifest persist between runs; OUTPUT_DIR is rebuilt from them with hard
+# links, so renumbering never touches the audio itself.
+AUDIO_STORE = os.path.join(DATA_ROOT, "processed_audio")
+MANIFEST_FILE = os.path.join(AUDIO_STORE, "manifest.sqlite")
 
 # Config
 TARGET_SR = 22050
@@ -37,77 +114,689 @@ MIN_DURATION = 1.0
 MAX_DURATION = 15.0
 MIN_RMS = 0.005   # Filter silence
 MAX_RMS = 0.5     # Filter clipped/distorted audio
+MIN_TEXT_CHARS = 2      # normalised transcripts shorter than this are empty
+MAX_TEXT_CHARS = 400    # ... and longer than this too long to align
+RESAMPLER = "soxr"            # see RESAMPLERS; --resampler overrides
+RESAMPLE_BLOCK_SECONDS = 30   # longer inputs are resampled block by block
+TRIM_TOP_DB = 40.0            # edge frames this far below the loudest are silence (None: no trim)
+TRIM_PAD_SECONDS = 0.1        # silence kept before the first / after the last loud frame
+TRIM_FRAME_LENGTH = 1024
+TRIM_HOP_LENGTH = 256
 
 # Lazy imports for audio (so script shows errors early for path issues)
-librosa = None
 sf = None
 
 
 def _ensure_audio_libs():
-    global librosa, sf
-    if librosa is None:
-        import librosa as _librosa
+    global sf
+    if sf is None:
         import soundfile as _sf
-        librosa = _librosa
         sf = _sf
 
 
+def configure(resampler, trim_top_db, trim_pad_seconds):
+    """Apply command-line settings; also run in every worker (spawn-safe)."""
+    global RESAMPLER, TRIM_TOP_DB, TRIM_PAD_SECONDS
+    RESAMPLER = resampler
+    TRIM_TOP_DB = trim_top_db
+    TRIM_PAD_SECONDS = trim_pad_seconds
+
+
+def audio_settings():
+    """configure() arguments reproducing the current settings."""
+    return RESAMPLER, TRIM_TOP_DB, TRIM_PAD_SECONDS
+
+
+# =============================================================================
+# Resampling backends — fn(y, sr, target_sr) -> float32 array
+# =============================================================================
+
+def resample_soxr(y, sr, target_sr):
+    """libsoxr, high quality: exactly what librosa.load(sr=...) did."""
+    import soxr
+    return soxr.resample(y, sr, target_sr, quality="HQ")
+
+
+def resample_poly(y, sr, target_sr, block_seconds=None):
+    """
+    scipy polyphase filter (up/down = target_sr/sr in lowest terms).  Inputs
+    longer than *block_seconds* are filtered block by block with enough
+    context on each side that the output matches a single call, while the
+    working memory stays bounded.
+    """
+    from math import gcd
+    from scipy.signal import resample_poly as _resample_poly
+
+    common = gcd(sr, target_sr)
+    up, down = target_sr // common, sr // common
+    block = int((block_seconds or RESAMPLE_BLOCK_SECONDS) * sr) // down * down
+    if len(y) <= block or block == 0:
+        return _resample_poly(y, up, down).astype(np.float32, copy=False)
+
+    # The default filter reaches 10 * max(up, down) samples either side at
+    # the upsampled rate; round the context up to whole multiples of *down*
+    # so block boundaries land on exact output samples.
+    reach = -(-10 * max(up, down) // up)        # in input samples, rounded up
+    context = (reach // down + 1) * down
+    out_len = -(-len(y) * up // down)
+    out = np.empty(out_len, dtype=np.float32)
+    for start in range(0, len(y), block):
+        lo = max(start - context, 0)
+        hi = min(start + block + context, len(y))
+        part = _resample_poly(y[lo:hi], up, down)
+        first = (start - lo) * up // down
+        out_start = start * up // down
+        count = min(block * up // down, out_len - out_start)
+        out[out_start:out_start + count] = part[first:first + count]
+    return out
+
+
+RESAMPLERS = {
+    "soxr": resample_soxr,
+    "poly": resample_poly,
+}
+
+
+def resample(y, sr, target_sr, backend=None):
+    """Resample with RESAMPLERS[backend or RESAMPLER]; matching rates cost nothing."""
+    if sr == target_sr:
+        return y
+    return RESAMPLERS[backend or RESAMPLER](y, sr, target_sr)
+
+
+def load_audio(path, target_sr=None):
+    """Read *path* (or a file object) as mono float32 (channels averaged) at *target_sr*."""
+    _ensure_audio_libs()
+    y, sr = sf.read(path, dtype="float32", always_2d=True)
+    y = y[:, 0] if y.shape[1] == 1 else y.mean(axis=1)
+    target_sr = target_sr or TARGET_SR
+    return resample(y, sr, target_sr), target_sr
+
+
+# =============================================================================
+# Sources — a WAV path, or with --from-zip a (zip path, member) pair
+# =============================================================================
+
+_zip_files = {}          # (pid, zip path) -> ZipFile; a forked worker must not share one
+_zip_members = None      # {fid: member name} while decoding from a zip
+_source_zip = None
+_ZipStat = namedtuple('_ZipStat', 'st_size st_mtime_ns')
+_WavInfo = namedtuple('_WavInfo', 'frames samplerate channels')
+
+
+def _open_zip(zip_path):
+    key = (os.getpid(), zip_path)
+    if key not in _zip_files:
+        _zip_files[key] = zipfile.ZipFile(zip_path)
+    return _zip_files[key]
+
+
+def use_source_zip(zip_path):
+    """Take source audio from the WAV members of *zip_path*; returns how many there are."""
+    global _zip_members, _source_zip
+    _source_zip = zip_path
+    _zip_members = {}
+    for name in _open_zip(zip_path).namelist():
+        base = os.path.basename(name)
+        if base.endswith('.wav'):
+            _zip_members[base[:-len('.wav')]] = name
+    return len(_zip_members)
+
+
+def source_path(fid):
+    if _zip_members is not None:
+        return (_source_zip, _zip_members.get(fid[:-len('.wav')] if fid.endswith('.wav') else fid))
+    src = os.path.join(SOURCE_WAVS, fid)
+    if not src.endswith('.wav'):
+        src = src + ".wav"
+    return src
+
+
+def source_stat(src):
+    """os.stat(src); for a zip member, its size and date as an extracted file would have them."""
+    if not isinstance(src, tuple):
+        return os.stat(src)
+    zip_path, member = src
+    if member is None:
+        raise FileNotFoundError(f"not in {zip_path}")
+    info = _open_zip(zip_path).getinfo(member)
+    return _ZipStat(info.file_size, zip_mtime_ns(info))
+
+
+def source_exists(fid):
+    try:
+        source_stat(source_path(fid))
+    except (OSError, KeyError):
+        return False
+    return True
+
+
+def _wav_header(f):
+    """(frames, samplerate, channels) from the RIFF/WAVE chunks at the start of *f*."""
+    if f.read(4) != b'RIFF' or f.read(8)[4:] != b'WAVE':
+        raise ValueError("not a RIFF/WAVE file")
+    samplerate = channels = block_align = None
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            raise ValueError("no data chunk")
+        chunk, size = head[:4], struct.unpack('<I', head[4:])[0]
+        if chunk == b'data':
+            if not block_align:
+                raise ValueError("no valid fmt chunk before the data chunk")
+            return _WavInfo(size // block_align, samplerate, channels)
+        body = f.read(size + (size & 1))
+        if chunk == b'fmt ':
+            if len(body) < 14:
+                raise ValueError("truncated fmt chunk")
+            _, channels, samplerate, _, block_align = struct.unpack('<HHIIH', body[:14])
+
+
+def source_info(src):
+    """
+    soundfile.info of a source.  A zip member's header is parsed here
+    instead: soundfile's file-object callbacks in the header threads can
+    deadlock the audio workers forked next to them.
+    """
+    _ensure_audio_libs()
+    if not isinstance(src, tuple):
+        return sf.info(src)
+    with _open_zip(src[0]).open(src[1]) as f:
+        return _wav_header(f)
+
+
+def read_source(src):
+    """(SHA-256 of the source file, what load_audio should read): a zip member is read once."""
+    if not isinstance(src, tuple):
+        return file_sha256(src), src
+    data = _open_zip(src[0]).read(src[1])
+    return hashlib.sha256(data).hexdigest(), io.BytesIO(data)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with (_open_zip(path[0]).open(path[1]) if isinstance(path, tuple) else open(path, 'rb')) as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def classify(duration, rms=None):
+    """
+    Return "ok" if a clip passes the duration/RMS filters, else the reason.
+    With rms=None (only the header has been read) just the duration is checked.
+    """
+    if duration < MIN_DURATION:
+        return "too_short"
+    if duration > MAX_DURATION:
+        return "too_long"
+    if rms is None:
+        return "ok"
+    if rms < MIN_RMS:
+        return "too_quiet"
+    if rms > MAX_RMS:
+        return "too_loud"
+    return "ok"
+
+
+def read_header(filename, source_path):
+    """
+    Manifest record for *source_path* from its header alone — frame count,
+    sample rate and channels; no sample data is read.  The outcome is the
+    duration filter's verdict, or "unreadable".
+    """
+    _ensure_audio_libs()
+    record = {'fid': filename, 'size': None, 'mtime_ns': None, 'sha256': None,
+              'duration': None, 'rms': None, 'trimmed': None, 'fingerprint': None,
+              'outcome': "unreadable"}
+    try:
+        stat = source_stat(source_path)
+        info = source_info(source_path)
+    except Exception:
+        return record
+    record.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    if info.frames > 0 and info.samplerate > 0 and info.channels > 0:
+        record['duration'] = info.frames / info.samplerate
+        record['outcome'] = classify(record['duration'])
+        if record['outcome'] == "too_long" and TRIM_TOP_DB is not None:
+            record['outcome'] = "ok"            # trimming may bring it under the limit
+    return record
+
+
+def trim_silence(y, sr, top_db=None, pad_seconds=None):
+    """
+    Cut leading and trailing silence from *y*.
+
+    Frame energy comes from a strided view (no copies, no Python loop);
+    frames more than *top_db* below the loudest one are silence, and
+    *pad_seconds* of audio is kept on either side of the first and last loud
+    frame.  Returns the trimmed view.
+    """
+    top_db = TRIM_TOP_DB if top_db is None else top_db
+    pad_seconds = TRIM_PAD_SECONDS if pad_seconds is None else pad_seconds
+    if len(y) < TRIM_FRAME_LENGTH:
+        return y
+    frames = np.lib.stride_tricks.sliding_window_view(y, TRIM_FRAME_LENGTH)[::TRIM_HOP_LENGTH]
+    energy = np.einsum('ij,ij->i', frames, frames)
+    loud = np.flatnonzero(energy > energy.max() * 10.0 ** (-top_db / 10))
+    if not len(loud):                       # digital silence: leave it to the RMS filter
+        return y
+    pad = int(pad_seconds * sr)
+    start = max(loud[0] * TRIM_HOP_LENGTH - pad, 0)
+    end = min(loud[-1] * TRIM_HOP_LENGTH + TRIM_FRAME_LENGTH + pad, len(y))
+    return y[start:end]
+
+
 def analyze_and_process(filename, source_path, target_path):
-    """Load, resample, filter, and save a single audio file."""
+    """
+    Load, resample, trim, filter, and save a single audio file.
+
+    Returns its manifest record: source size / mtime / SHA-256, duration and
+    RMS after trimming, seconds trimmed, the audio fingerprint (accepted
+    clips only, see dedup.py) and outcome ("ok", the filter that rejected
+    it, or "error").  The
+    WAV is written under a temporary name and renamed, so an interrupted run
+    never leaves a truncated file behind.
+    """
     _ensure_audio_libs()
+    record = {'fid': filename, 'size': None, 'mtime_ns': None, 'sha256': None,
+              'duration': None, 'rms': None, 'trimmed': None, 'fingerprint': None,
+              'outcome': "error"}
     try:
-        y, sr = librosa.load(source_path, sr=TARGET_SR, mono=True)
+        stat = source_stat(source_path)
+        sha256, audio = read_source(source_path)
+        record.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=sha256)
+        y, sr = load_audio(audio)
 
-        # Audio Filtering
-        duration = librosa.get_duration(y=y, sr=sr)
-        rms = np.sqrt(np.mean(y ** 2))
+        # Edge silence, then filters on what is left
+        if TRIM_TOP_DB is not None:
+            untrimmed = len(y)
+            y = trim_silence(y, sr)
+            record['trimmed'] = (untrimmed - len(y)) / sr
 
-        if duration < MIN_DURATION or duration > MAX_DURATION:
-            return False
-        if rms < MIN_RMS or rms > MAX_RMS:
-            return False
+        # Audio Filtering
+        duration = len(y) / sr
+        rms = float(np.sqrt(np.mean(y ** 2)))
+        record.update(duration=duration, rms=rms, outcome=classify(duration, rms))
 
         # Save
-        sf.write(target_path, y, sr)
-        return True
+        if record['outcome'] == "ok":
+            record['fingerprint'] = audio_fingerprint(y)
+            sf.write(target_path + ".tmp", y, sr, format="WAV")
+            os.replace(target_path + ".tmp", target_path)
     except Exception as e:
         print(f"Error processing {filename}: {e}")
+    return record
+
+
+def process_chunk(tasks):
+    """Worker entry point: analyze_and_process each (fid, src, dst) in *tasks*."""
+    return [analyze_and_process(fid, src, dst) for fid, src, dst in tasks]
+
+
+class BuildManifest:
+    """
+    What the previous build did with every source file: size, mtime,
+    SHA-256, the processing parameters it ran with, the measured duration
+    and RMS, and the outcome.  Stored in SQLite and committed a chunk at a
+    time, so an interrupted build resumes where it stopped.
+    """
+
+    FIELDS = ('fid', 'size', 'mtime_ns', 'sha256', 'target_sr', 'resampler',
+              'trim_top_db', 'trim_pad_seconds', 'min_duration', 'max_duration',
+              'min_rms', 'max_rms', 'duration', 'rms', 'trimmed', 'fingerprint', 'outcome')
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(audio)")]
+        if columns and columns != list(self.FIELDS):
+            # Written by an older format_data: start over rather than guess
+            self.conn.execute("DROP TABLE audio")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS audio "
+                          f"({', '.join(self.FIELDS)}, PRIMARY KEY (fid))")
+        self.entries = {row[0]: dict(zip(self.FIELDS, row)) for row in
+                        self.conn.execute(f"SELECT {', '.join(self.FIELDS)} FROM audio")}
+
+    @staticmethod
+    def audio_params():
+        """Parameters that change the processed audio itself."""
+        return {'target_sr': TARGET_SR, 'resampler': RESAMPLER,
+                'trim_top_db': TRIM_TOP_DB, 'trim_pad_seconds': TRIM_PAD_SECONDS}
+
+    @classmethod
+    def params(cls):
+        return dict(cls.audio_params(), min_duration=MIN_DURATION, max_duration=MAX_DURATION,
+                    min_rms=MIN_RMS, max_rms=MAX_RMS)
+
+    def record(self, records):
+        """Store *records* (from analyze_and_process) with the current parameters."""
+        rows = []
+        for record in records:
+            entry = dict(record, **self.params())
+            self.entries[entry['fid']] = entry
+            rows.append(tuple(entry[field] for field in self.FIELDS))
+        self.conn.executemany(f"INSERT OR REPLACE INTO audio VALUES "
+                              f"({', '.join('?' * len(self.FIELDS))})", rows)
+
+    def remove(self, fids):
+        for fid in fids:
+            self.entries.pop(fid, None)
+        self.conn.executemany("DELETE FROM audio WHERE fid = ?", [(fid,) for fid in fids])
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def _unchanged_source(entry, src, stat):
+    """Same size and mtime, or (e.g. after re-extraction) same size and hash."""
+    if entry['size'] != stat.st_size:
         return False
+    if entry['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    return entry['sha256'] is not None and entry['sha256'] == file_sha256(src)
+
+
+def audio_tasks(rows, manifest, missing, reused):
+    """
+    Yield (fid, src, store_path) for every row whose audio must be decoded.
+
+    A row whose source file and audio parameters (rate, resampler, trim)
+    are unchanged since the manifest entry is re-filtered from the recorded duration and RMS instead, so a
+    threshold change costs no decoding; accepted ones are appended to
+    *reused*.  Rows without audio go to *missing*.
+    """
+    for fid, text, spk in rows:
+        src = source_path(fid)
+        try:
+            stat = source_stat(src)
+        except (OSError, KeyError):
+            missing.append(fid)
+            continue
+
+        dst = os.path.join(AUDIO_STORE, f"{fid}.wav")
+        entry = manifest.entries.get(fid)
+        if (entry and entry['outcome'] not in ("error", "unreadable")
+                and all(entry[key] == value
+                        for key, value in BuildManifest.audio_params().items())
+                and _unchanged_source(entry, src, stat)):
+            # rms is None for clips the header prefilter rejected; if their
+            # duration now passes they have no stored audio and are decoded
+            outcome = classify(entry['duration'], entry['rms'])
+            if outcome != "ok" or os.path.exists(dst):
+                if outcome != "ok" and os.path.exists(dst):
+                    os.remove(dst)
+                manifest.record([dict(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                                      outcome=outcome)])
+                if outcome == "ok":
+                    reused.append(fid)
+                continue
+
+        yield fid, src, dst
+
+
+def prefilter_headers(tasks, workers, rejected, chunk_size=256):
+    """
+    Yield the (fid, src, dst) *tasks* whose header passes the duration filter.
+    Headers are read *chunk_size* at a time on *workers* threads (the work
+    is file I/O); the records of rejected files are appended to *rejected*.
+    """
+    tasks = iter(tasks)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk in iter(lambda: list(islice(tasks, chunk_size)), []):
+            headers = executor.map(read_header, *zip(*((fid, src) for fid, src, _ in chunk)))
+            for task, record in zip(chunk, headers):
+                if record['outcome'] == "ok":
+                    yield task
+                else:
+                    rejected.append(record)
+
+
+def drop_from_store(manifest, fids):
+    """Forget *fids*: delete their processed audio and manifest entries."""
+    for fid in fids:
+        stale = os.path.join(AUDIO_STORE, f"{fid}.wav")
+        if os.path.exists(stale):
+            os.remove(stale)
+    manifest.remove(fids)
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+# Order of the stages in the rejection report
+STAGES = ("text", "header", "audio", "dedup", "speaking rate")
+
+# Only Devanagari letters/signs, dandas, spaces and ordinary punctuation may
+# be left out of the spoken text; digits, Latin and symbols are leftovers,
+# whether they survive normalisation or its character filter deletes them.
+_LEFTOVER_RE = re.compile(r"[^\u0900-\u0965\u0970-\u097F\s\u200c\u200d.,?!;:'\"()\-\u2013\u2014\u2026]")
+
+
+def normalize_transcripts(rows, norm_cache, workers=1):
+    """
+    ({fid: normalised text}, errors) for (fid, raw text, ...) *rows*; cache
+    misses are normalised on *workers* processes.  A transcript the
+    normaliser fails on is kept as it is and counted.
+    """
+    texts = [row[1] for row in rows]
+    try:
+        normalized = norm_cache.normalize_many(texts, workers)
+        return {row[0]: text for row, text in zip(rows, normalized)}, 0
+    except Exception:
+        pass                      # find the offending rows one by one
+    norm_by_fid = {}
+    normalization_errors = 0
+    for fid, raw_text, *_ in rows:
+        try:
+            norm_by_fid[fid] = norm_cache.normalize(raw_text)
+        except Exception as e:
+            print(f"  Normalization error for {fid}: {e}")
+            norm_by_fid[fid] = raw_text
+            normalization_errors += 1
+    return norm_by_fid, normalization_errors
+
+
+def validate_transcript(text, max_chars=MAX_TEXT_CHARS, allow_leftovers=False, dropped=''):
+    """
+    None if normalised *text* is fit for training, else why it is not.
+    *dropped* is what normalisation deleted from the raw transcript
+    (normalize_marathi.dropped_chars): a deleted Latin word or symbol means
+    the text no longer matches the audio.
+    """
+    if not text or len(text.strip()) < MIN_TEXT_CHARS:
+        return "empty_text"
+    if len(text) > max_chars:
+        return "text_too_long"
+    if not allow_leftovers and (_LEFTOVER_RE.search(text) or _LEFTOVER_RE.search(dropped)):
+        return "non_devanagari"
+    return None
+
+
+def write_rejections(path, rejections):
+    """rejections.tsv: fid, stage and reason of every row left out of the dataset."""
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("fid\tstage\treason\n")
+        for fid, stage, reason in sorted(rejections):
+            f.write(f"{fid}\t{stage}\t{reason}\n")
+
+
+def write_duplicates(path, removed):
+    """duplicates.tsv: removed fid, kept fid, reason and the fid it matched, durations."""
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("removed\tkept\treason\tmatched\tremoved_seconds\tkept_seconds\n")
+        for dropped, kept, reason, matched in removed:
+            f.write(f"{dropped['fid']}\t{kept['fid']}\t{reason}\t{matched['fid']}\t"
+                    f"{dropped['duration']:.3f}\t{kept['duration']:.3f}\n")
+
+
+def write_rate_outliers(path, fids, rates, norm_by_fid, speaker_by_fid):
+    """rate_outliers.tsv: the rejected clips with their rates, z-score and transcript."""
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("fid\tspeaker\tchars\tphones\tchars_per_sec\tphones_per_sec\tz\ttext\n")
+        for i in np.flatnonzero(rates['outlier']):
+            fid = fids[i]
+            f.write(f"{fid}\t{speaker_by_fid[fid]}\t{rates['chars'][i]}\t{rates['phones'][i]}\t"
+                    f"{rates['chars_per_sec'][i]:.2f}\t{rates['phones_per_sec'][i]:.2f}\t"
+                    f"{rates['z'][i]:+.2f}\t{norm_by_fid[fid]}\n")
+
+
+def write_ljspeech(out_dir, fids, norm_by_fid, speaker_by_fid, entries, multi_speaker=False):
+    """
+    Write an LJSpeech directory for *fids*: wavs/ (links into AUDIO_STORE,
+    renumbered 00000...), metadata.csv (id|text|text, or id|speaker|text with
+    *multi_speaker*) and lengths.tsv.  Returns the utterances written.
+    """
+    os.makedirs(os.path.join(out_dir, "wavs"), exist_ok=True)
+    metadata = []
+    lengths = []
+
+    # Sort by original file id for deterministic ordering
+    for idx, fid in enumerate(sorted(fids)):
+        seq_id = f"{idx:05d}"
+        norm_text = norm_by_fid[fid]
+
+        _link_or_copy(os.path.join(AUDIO_STORE, f"{fid}.wav"),
+                      os.path.join(out_dir, "wavs", f"{seq_id}.wav"))
+
+        # LJSpeech format: id|text|text (Piper multi-speaker: id|speaker|text)
+        if multi_speaker:
+            metadata.append(f"{seq_id}|{speaker_by_fid[fid]}|{norm_text}")
+        else:
+            metadata.append(f"{seq_id}|{norm_text}|{norm_text}")
+        lengths.append(f"{seq_id}\t{entries[fid]['duration']:.3f}\t{len(norm_text)}")
+
+    with open(os.path.join(out_dir, "metadata.csv"), 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(metadata))
+    with open(os.path.join(out_dir, "lengths.tsv"), 'w', encoding='utf-8', newline='\n') as f:
+        f.write(''.join(line + '\n' for line in lengths))
+    return len(metadata)
+
+
+def run_audio_pipeline(tasks, workers, backend="process", chunk_size=16):
+    """
+    Yield the result list of process_chunk for every chunk of *tasks*, in
+    completion order.  Tasks are pulled lazily in chunks of *chunk_size* and
+    at most two chunks per worker are in flight, so memory stays flat however
+    large the dataset is.  backend is "process" (decoding and resampling
+    are CPU-bound) or "thread".
+    """
+    executor_class = (concurrent.futures.ProcessPoolExecutor if backend == "process"
+                      else concurrent.futures.ThreadPoolExecutor)
+    tasks = iter(tasks)
+    with executor_class(max_workers=workers, initializer=configure,
+                        initargs=audio_settings()) as executor:
+        pending = set()
+        for chunk in iter(lambda: list(islice(tasks, chunk_size)), []):
+            pending.add(executor.submit(process_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in concurrent.futures.as_completed(pending):
+            yield future.result()
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the LJSpeech-format Marathi dataset")
+    parser.add_argument("--normalizer-stats", nargs="?", const="-", default=None,
+                        metavar="JSON",
+                        help="Print per-rule normalizer statistics; with a path, also "
+                             "dump them as JSON")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Parallel audio workers (default: all cores)")
+    parser.add_argument("--backend", choices=("process", "thread"), default="process",
+                        help="Run audio workers as processes (default) or threads")
+    parser.add_argument("--chunk-size", type=int, default=16,
+                        help="Utterances handed to a worker at a time")
+    parser.add_argument("--resampler", choices=sorted(RESAMPLERS), default=RESAMPLER,
+                        help=f"Resampling backend (default: {RESAMPLER}); compare them "
+                             "with benchmark_resampling.py")
+    parser.add_argument("--trim-db", type=float, default=TRIM_TOP_DB,
+                        help=f"Trim edge frames this many dB below the loudest frame "
+                             f"(default: {TRIM_TOP_DB})")
+    parser.add_argument("--trim-pad", type=float, default=TRIM_PAD_SECONDS,
+                        help=f"Seconds of silence to keep at each edge (default: {TRIM_PAD_SECONDS})")
+    parser.add_argument("--no-trim", action="store_true", help="Keep edge silence")
+    parser.add_argument("--shards", action="store_true",
+                        help=f"Also pack each dataset into int16 shards (shards/ next to "
+                             f"metadata.csv, e.g. {OUTPUT_SHARDS})")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Discard processed audio and the build manifest; redo everything")
+    speakers = parser.add_mutually_exclusive_group()
+    speakers.add_argument("--top", type=int, default=None, metavar="N",
+                          help="Build the N speakers with the most utterances (default: 1)")
+    speakers.add_argument("--speaker", nargs="+", default=None, metavar="ID",
+                          help="Build these speakers")
+    speakers.add_argument("--min-utterances", type=int, default=None, metavar="K",
+                          help="Build every speaker with at least K utterances")
+    parser.add_argument("--dedup", choices=("text", "audio", "both"), default=None,
+                        help="Drop duplicate transcripts and/or near-identical audio "
+                             "(per speaker)")
+    parser.add_argument("--dedup-keep", choices=sorted(KEEP_POLICIES), default="first",
+                        help="Which utterance of a duplicate group survives (default: first)")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8,
+                        help="Estimated Jaccard similarity of transcript shingles that "
+                             "counts as a near duplicate (default: 0.8)")
+    parser.add_argument("--dedup-audio-bits", type=int, default=4,
+                        help="Audio fingerprints differing in at most this many of 63 bits "
+                             "are near-identical (default: 4)")
+    parser.add_argument("--max-rate-z", type=float, default=None, metavar="Z",
+                        help="Drop clips whose characters/sec or phonemes/sec is more than Z "
+                             "robust standard deviations from their speaker's median (e.g. 3.5)")
+    parser.add_argument("--max-text-chars", type=int, default=MAX_TEXT_CHARS,
+                        help=f"Reject normalised transcripts longer than this "
+                             f"(default: {MAX_TEXT_CHARS})")
+    parser.add_argument("--allow-non-devanagari", action="store_true",
+                        help="Keep transcripts with digits, Latin or symbols that "
+                             "normalisation leaves behind or deletes")
+    parser.add_argument("--multi-speaker", action="store_true",
+                        help="Write one multi-speaker metadata.csv (id|speaker|text) instead "
+                             f"of one directory per speaker under {OUTPUT_DIR}")
+    parser.add_argument("--from-zip", nargs="?", const=SOURCE_ZIP, default=None, metavar="ZIP",
+                        help=f"Decode source WAVs straight from the dataset zip instead of "
+                             f"{SOURCE_WAVS} (default zip: {SOURCE_ZIP})")
+    args = parser.parse_args()
+    configure(args.resampler, None if args.no_trim else args.trim_db, args.trim_pad)
+
     # Validate source data exists
     if not os.path.exists(TRANSCRIPT_FILE):
         print(f"ERROR: Missing transcript file: {TRANSCRIPT_FILE}")
         print(f"Make sure you've extracted OpenSLR-64 into: {DATA_ROOT}/mr_in_female/")
         return
 
-    if not os.path.exists(SOURCE_WAVS):
+    if args.from_zip:
+        if not os.path.exists(args.from_zip):
+            print(f"ERROR: Missing dataset zip: {args.from_zip}")
+            return
+        print(f"Decoding source audio straight from {args.from_zip} "
+              f"({use_source_zip(args.from_zip)} WAV members, no extraction)")
+    elif not os.path.exists(SOURCE_WAVS):
         print(f"ERROR: Missing source audio directory: {SOURCE_WAVS}")
+        print(f"Extract it with 'python scripts/download_dataset.py', or pass --from-zip.")
         return
 
-    # Clean output directory for reproducible results
+    # Clean output directory for reproducible results (it only holds links
+    # into AUDIO_STORE, which keeps the processed audio between runs)
     if os.path.exists(OUTPUT_DIR):
         print(f"Cleaning previous output: {OUTPUT_DIR}")
         shutil.rmtree(OUTPUT_DIR)
-    os.makedirs(OUTPUT_WAVS, exist_ok=True)
+    if args.rebuild and os.path.exists(AUDIO_STORE):
+        print(f"Discarding processed audio: {AUDIO_STORE}")
+        shutil.rmtree(AUDIO_STORE)
+    os.makedirs(AUDIO_STORE, exist_ok=True)
 
     # 1. Read Transcripts & Analyze Speakers
     print("Reading transcripts...")
-    all_rows = []
-    speaker_counts = Counter()
-
-    with open(TRANSCRIPT_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f, delimiter='\t')
-        for row in reader:
-            if len(row) >= 2:
-                fid = row[0].strip()
-                text = row[1].strip()
-                parts = fid.split('_')
-                if len(parts) >= 2:
-                    speaker_id = parts[1]
-                    speaker_counts[speaker_id] += 1
-                    all_rows.append((fid, text, speaker_id))
+    all_rows, speaker_counts = read_line_index(TRANSCRIPT_FILE)
 
     if not all_rows:
         print("No data found in transcript file.")
@@ -118,96 +807,228 @@ def main():
     for spk, count in speaker_counts.most_common(10):
         print(f"  Speaker {spk}: {count} utterances")
 
-    # Select Best Speaker
-    best_speaker, count = speaker_counts.most_common(1)[0]
-    print(f"\nSelected Best Speaker: {best_speaker} ({count} utterances)")
+    # Select Speakers (default: the best one)
+    try:
+        selected = select_speakers(speaker_counts, args.top, args.speaker, args.min_utterances)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+    if not selected:
+        print(f"ERROR: No speaker has {args.min_utterances} utterances or more")
+        return
+    if len(selected) == 1:
+        print(f"\nSelected Best Speaker: {selected[0]} ({speaker_counts[selected[0]]} utterances)")
+    else:
+        print(f"\nSelected {len(selected)} speakers: " +
+              ", ".join(f"{spk} ({speaker_counts[spk]})" for spk in selected))
 
     # Filter rows
-    speaker_rows = [r for r in all_rows if r[2] == best_speaker]
+    selected_set = set(selected)
+    speaker_rows = [r for r in all_rows if r[2] in selected_set]
 
-    # 2. Process Files
-    print(f"\nProcessing {len(speaker_rows)} utterances for speaker {best_speaker}...")
+    speaker_by_fid = {fid: spk for fid, _, spk in speaker_rows}
 
-    valid_results = []
+    # 2. Normalise and validate every transcript first: only rows that pass
+    #    are scheduled for audio work
+    print(f"\nNormalizing {len(speaker_rows)} transcripts...")
+    text_start = time.perf_counter()
+    norm_cache = NormalizationCache(NORMALIZE_CACHE)
+    profiler = profile_normalizer() if args.normalizer_stats else None
+    if profiler:
+        profiler.__enter__()
+    # The profiler only sees this process
+    norm_by_fid, normalization_errors = normalize_transcripts(
+        speaker_rows, norm_cache, 1 if profiler else args.workers)
+    norm_cache.close()
+    cache_stats = norm_cache.stats()
+    if profiler:
+        profiler.__exit__(None, None, None)
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        future_to_row = {}
-        skipped_missing = 0
+    rejections = []                 # (fid, stage, reason) of every row left out
+    audio_rows = []
+    for row in speaker_rows:
+        dropped = '' if args.allow_non_devanagari else dropped_chars(row[1])
+        reason = validate_transcript(norm_by_fid[row[0]], args.max_text_chars,
+                                     args.allow_non_devanagari, dropped)
+        if reason:
+            rejections.append((row[0], "text", reason))
+        else:
+            audio_rows.append(row)
+    print(f"  {len(audio_rows)} passed, {len(rejections)} rejected "
+          f"({time.perf_counter() - text_start:.2f}s)")
 
-        for fid, text, spk in speaker_rows:
-            src = os.path.join(SOURCE_WAVS, fid)
-            if not src.endswith('.wav'):
-                src = src + ".wav"
+    # 3. Process Files (every selected speaker in the same pass)
+    print(f"\nProcessing {len(audio_rows)} utterances for "
+          f"{'speaker ' + selected[0] if len(selected) == 1 else f'{len(selected)} speakers'}...")
 
-            if not os.path.exists(src):
-                skipped_missing += 1
-                continue
+    text_by_fid = {fid: text for fid, text, _ in audio_rows}
+    manifest = BuildManifest(MANIFEST_FILE)
 
-            dst = os.path.join(OUTPUT_WAVS, f"temp_{fid}.wav")
-            future = executor.submit(analyze_and_process, fid, src, dst)
-            future_to_row[future] = (fid, text, dst)
+    # Rows gone from line_index.tsv or whose source file is gone: drop their
+    # audio and manifest entries.  Rows merely left out of this build (text
+    # rejections, other speakers) keep them for the next build that wants them.
+    all_fids = {row[0] for row in all_rows}
+    removed = [fid for fid in manifest.entries
+               if fid not in all_fids or (fid not in text_by_fid and not source_exists(fid))]
+    drop_from_store(manifest, removed)
+    manifest.commit()
 
-        if skipped_missing:
-            print(f"  Skipped {skipped_missing} files (audio not found)")
+    valid_fids = []
+    missing = []
+    reused = []
+    header_rejects = []
+    processed = 0
+    start_time = time.perf_counter()
 
-        # Collect results
-        for future in tqdm(concurrent.futures.as_completed(future_to_row),
-                           total=len(future_to_row), desc="Filtering Audio"):
-            fid, raw_text, temp_wav = future_to_row[future]
-            try:
-                if future.result():
-                    valid_results.append((fid, raw_text, temp_wav))
-                else:
-                    if os.path.exists(temp_wav):
-                        os.remove(temp_wav)
-            except Exception as e:
-                print(f"Exception for {fid}: {e}")
+    with tqdm(total=len(audio_rows), desc="Filtering Audio") as progress:
+        tasks = prefilter_headers(audio_tasks(audio_rows, manifest, missing, reused),
+                                  args.workers, header_rejects)
+        for records in run_audio_pipeline(tasks, args.workers, args.backend, args.chunk_size):
+            manifest.record(records)
+            manifest.commit()
+            valid_fids.extend(r['fid'] for r in records if r['outcome'] == "ok")
+            processed += len(records)
+            progress.update(len(records))
+        progress.update(len(audio_rows) - processed)       # missing, unchanged, prefiltered
 
-    # 3. Finalize: Normalize Text, Renumber, Write Metadata
-    print("\nFinalizing dataset...")
-
-    # Sort by original file id for deterministic ordering
-    valid_results.sort(key=lambda x: x[0])
-
-    final_metadata = []
-    normalization_errors = 0
+    audio_seconds = time.perf_counter() - start_time
+    manifest.record(header_rejects)
+    deleted = [fid for fid in missing if fid in manifest.entries]
+    drop_from_store(manifest, deleted)
+    removed += deleted
+    header_fids = {r['fid'] for r in header_rejects}
+    rejections.extend((fid, "header" if fid in header_fids else "audio", entry['outcome'])
+                      for fid, entry in manifest.entries.items()
+                      if fid in text_by_fid and entry['outcome'] != "ok")
+    rejections.extend((fid, "audio", "missing") for fid in missing)
+    manifest.close()
+    valid_fids.extend(reused)
+    trimmed_hours = sum(manifest.entries[fid]['trimmed'] or 0 for fid in valid_fids) / 3600
+    kept_hours = sum(manifest.entries[fid]['duration'] for fid in valid_fids) / 3600
+    if missing:
+        print(f"  Skipped {len(missing)} files (audio not found)")
+    unchanged = len(audio_rows) - len(missing) - len(header_rejects) - processed
+    print(f"  Decoded {processed} files; {len(header_rejects)} rejected from the header "
+          f"alone; {unchanged} unchanged since the last build ({len(reused)} of them accepted)")
+    if removed:
+        print(f"  Removed {len(removed)} files no longer in the dataset")
+    set_aside = sum(1 for fid, entry in manifest.entries.items()
+                    if fid not in text_by_fid and entry['outcome'] == "ok")
+    if set_aside:
+        print(f"  {set_aside} processed files of other speakers or rejected rows stay in "
+              f"{AUDIO_STORE} for later builds")
 
-    for idx, (fid, raw_text, temp_wav) in enumerate(valid_results):
-        seq_id = f"{idx:05d}"
-        final_wav_path = os.path.join(OUTPUT_WAVS, f"{seq_id}.wav")
+    # 4. Finalize: Deduplicate, Renumber, Write Metadata
+    print("\nFinalizing dataset...")
 
-        # Rename temp to final
-        if os.path.exists(temp_wav):
-            os.rename(temp_wav, final_wav_path)
+    duplicates = []
+    if args.dedup:
+        dedup_start = time.perf_counter()
+        items = [{'fid': fid, 'group': speaker_by_fid[fid], 'text': text,
+                  'fingerprint': manifest.entries[fid]['fingerprint'],
+                  'duration': manifest.entries[fid]['duration']}
+                 for fid, text in ((fid, norm_by_fid[fid]) for fid in valid_fids)]
+        duplicates = find_duplicates(items, text=args.dedup in ("text", "both"),
+                                     audio=args.dedup in ("audio", "both"),
+                                     threshold=args.dedup_threshold,
+                                     max_bits=args.dedup_audio_bits, keep=args.dedup_keep)
+        dropped = {removed['fid'] for removed, _, _, _ in duplicates}
+        valid_fids = [fid for fid in valid_fids if fid not in dropped]
+        rejections.extend((removed['fid'], "dedup", reason) for removed, _, reason, _ in duplicates)
+        reasons = Counter(reason for _, _, reason, _ in duplicates)
+        print(f"  Deduplicated {len(items)} utterances in {time.perf_counter() - dedup_start:.2f}s: "
+              f"{len(duplicates)} removed" +
+              "".join(f", {count} {reason}" for reason, count in reasons.most_common()))
 
-        # Normalize text
-        try:
-            norm_text = normalize_text(raw_text)
-        except Exception as e:
-            print(f"  Normalization error for {fid}: {e}")
-            norm_text = raw_text
-            normalization_errors += 1
+    rate_fids, rates = [], None
+    if args.max_rate_z is not None:
+        rate_fids = sorted(valid_fids)
+        rates = rate_outliers([norm_by_fid[fid] for fid in rate_fids],
+                              [manifest.entries[fid]['duration'] for fid in rate_fids],
+                              [speaker_by_fid[fid] for fid in rate_fids], args.max_rate_z)
+        outliers = {rate_fids[i] for i in np.flatnonzero(rates['outlier'])}
+        valid_fids = [fid for fid in valid_fids if fid not in outliers]
+        rejections.extend((fid, "speaking rate", "outlier") for fid in outliers)
+        print(f"  Speaking rate: {len(outliers)} of {len(rate_fids)} clips beyond "
+              f"|z| > {args.max_rate_z} (median {np.median(rates['chars_per_sec']):.1f} "
+              f"chars/s, {np.median(rates['phones_per_sec']):.1f} phonemes/s)")
+        print("  Characters per second (x: rejected):")
+        print(histogram(rates['chars_per_sec'], rates['outlier']))
 
-        if not norm_text or len(norm_text.strip()) < 2:
-            # Skip empty/trivial normalizations
-            if os.path.exists(final_wav_path):
-                os.remove(final_wav_path)
-            continue
+    if args.multi_speaker or len(selected) == 1:
+        targets = [(OUTPUT_DIR, valid_fids)]
+    else:
+        by_speaker = {spk: [] for spk in selected}
+        for fid in valid_fids:
+            by_speaker[speaker_by_fid[fid]].append(fid)
+        targets = [(os.path.join(OUTPUT_DIR, spk), fids) for spk, fids in by_speaker.items()]
 
-        # LJSpeech format: id|text|text
-        final_metadata.append(f"{seq_id}|{norm_text}|{norm_text}")
+    written = {}
+    for out_dir, fids in targets:
+        written[out_dir] = write_ljspeech(out_dir, fids, norm_by_fid, speaker_by_fid,
+                                          manifest.entries, args.multi_speaker)
+    if args.dedup:
+        write_duplicates(OUTPUT_DUPLICATES, duplicates)
+    if rates is not None:
+        write_rate_outliers(OUTPUT_RATE_OUTLIERS, rate_fids, rates, norm_by_fid, speaker_by_fid)
+    write_rejections(OUTPUT_REJECTIONS, rejections)
 
-    # Write metadata
-    with open(OUTPUT_METADATA, 'w', encoding='utf-8', newline='\n') as f:
-        f.write('\n'.join(final_metadata))
+    shards = {}
+    if args.shards:
+        print("Packing shards...")
+        for out_dir, _ in targets:
+            ljspeech_to_shards(out_dir, os.path.join(out_dir, "shards"))
+            shards[out_dir] = ShardDataset(os.path.join(out_dir, "shards"))
+    total_written = sum(written.values())
 
     # Summary
     print(f"\n=== Dataset Creation Complete ===")
-    print(f"  Valid samples:          {len(final_metadata)}")
-    print(f"  Filtered out:           {len(speaker_rows) - len(final_metadata)}")
+    print(f"  Valid samples:          {total_written}")
+    print(f"  Filtered out:           {len(speaker_rows) - total_written}")
     print(f"  Normalization warnings:  {normalization_errors}")
-    print(f"  Output directory:       {OUTPUT_DIR}")
-    print(f"  Metadata file:          {OUTPUT_METADATA}")
+    if rejections:
+        print(f"  Rejected by stage (ids in {OUTPUT_REJECTIONS}):")
+        for (stage, reason), count in sorted(Counter((stage, reason) for _, stage, reason
+                                                     in rejections).items(),
+                                             key=lambda item: (STAGES.index(item[0][0]),
+                                                               -item[1])):
+            print(f"    {stage:14s} {reason:16s} {count:>6}")
+    if args.dedup:
+        print(f"  Duplicates removed:     {len(duplicates)} (pairs in {OUTPUT_DUPLICATES})")
+    if rates is not None:
+        print(f"  Speaking-rate outliers: {int(rates['outlier'].sum())} "
+              f"(ids in {OUTPUT_RATE_OUTLIERS})")
+    if TRIM_TOP_DB is not None:
+        print(f"  Silence trimmed:        {trimmed_hours:.2f} h ({trimmed_hours * 60:.1f} min) "
+              f"from accepted clips "
+              f"({trimmed_hours / max(trimmed_hours + kept_hours, 1e-9):.1%} of their audio)")
+    print(f"  Audio throughput:       {processed / max(audio_seconds, 1e-9):.1f} files/sec "
+          f"({processed} files in {audio_seconds:.1f}s, {args.workers} {args.backend} workers)")
+    print(f"  Normalization cache:    {cache_stats['hit_rate']:.1%} hits "
+          f"({cache_stats['memory_hits'] + cache_stats['disk_hits']}/{cache_stats['lookups']})")
+    if len(targets) == 1:
+        print(f"  Output directory:       {OUTPUT_DIR}")
+        print(f"  Metadata file:          {OUTPUT_METADATA}")
+        print(f"  Lengths file:           {OUTPUT_LENGTHS}")
+        if args.multi_speaker:
+            print(f"  Speakers:               {len(selected)} (metadata is id|speaker|text; "
+                  f"preprocess without --single-speaker)")
+    else:
+        print(f"  Output directories:     {len(targets)} (one per speaker)")
+        for out_dir, _ in targets:
+            print(f"    {out_dir}  {written[out_dir]} utterances")
+    for out_dir, dataset in shards.items():
+        print(f"  Shards:                 {len(dataset.shards)} file(s), "
+              f"{dataset.duration() / 3600:.2f} h: {os.path.join(out_dir, 'shards')}")
+
+    if profiler:
+        print(f"\n=== Normalizer Rule Statistics ===")
+        print(f"  (cache hits are not re-normalised: {cache_stats['misses']} of "
+              f"{cache_stats['lookups']} transcripts profiled)")
+        print(profiler.stats.report())
+        if args.normalizer_stats != "-":
+            profiler.stats.dump(args.normalizer_stats)
+            print(f"  Written to: {args.normalizer_stats}")
 
 
 if __name__ == "__main__":
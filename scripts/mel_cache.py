@@ -0,0 +1,267 @@
+"""
+Precompute log-mel spectrograms for a built dataset, once.
+
+The audio does not change after format_data.py, so the features computed from
+it every time the data is loaded can be computed once and memory-mapped:
+  - parameters (sample rate, filter/window length, hop, n_mels, fmin/fmax)
+    come from the Piper training config.json, with Piper's VITS defaults for
+    anything it does not list
+  - the STFT is one vectorised rfft over a strided frame view per utterance,
+    computed exactly like piper_train's mel_spectrogram_torch (reflect padding,
+    Hann window, magnitude, Slaney mel basis, log with a 1e-5 floor)
+  - features are packed into one float32 file (frames x n_mels per
+    utterance) with an index, readable zero-copy through MelCache
+  - manifest.json records the parameters and each WAV's size/mtime; changed
+    WAVs are recomputed, and a parameter change invalidates everything
+  - utterances are spread over a process pool; features/sec is reported
+
+Usage:
+    python scripts/mel_cache.py
+    python scripts/mel_cache.py --config training_filtered/config.json --workers 8
+    python scripts/mel_cache.py --dataset data/ljspeech_filtered --output data/mel_cache
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import concurrent.futures
+from itertools import islice
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATASET_DIR = os.path.join(PROJECT_ROOT, "data", "ljspeech_filtered")
+CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "mel_cache")
+TRAINING_CONFIG = os.path.join(PROJECT_ROOT, "training_filtered", "config.json")
+
+# piper_train VITS defaults (medium quality)
+DEFAULT_PARAMS = {
+    'sample_rate': 22050,
+    'filter_length': 1024,
+    'hop_length': 256,
+    'win_length': 1024,
+    'mel_channels': 80,
+    'mel_fmin': 0.0,
+    'mel_fmax': None,
+}
+# Other spellings accepted in config.json
+PARAM_ALIASES = {
+    'n_fft': 'filter_length', 'hop_size': 'hop_length', 'win_size': 'win_length',
+    'n_mels': 'mel_channels', 'num_mels': 'mel_channels', 'fmin': 'mel_fmin',
+    'fmax': 'mel_fmax',
+}
+
+
+def load_params(config_path):
+    """Mel parameters from a Piper config.json ("audio" section or top level)."""
+    params = dict(DEFAULT_PARAMS)
+    if config_path and os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        for section in (config, config.get('audio') or {}):
+            for key, value in section.items():
+                key = PARAM_ALIASES.get(key, key)
+                if key in params and not isinstance(value, dict):
+                    params[key] = value
+    return params
+
+
+# =============================================================================
+# Feature extraction (runs in the workers)
+# =============================================================================
+
+_mel_basis = None
+_window = None
+
+
+def _hz_to_mel(hz):
+    """Slaney mel scale: linear below 1 kHz, logarithmic above."""
+    hz = np.asarray(hz, dtype=np.float64)
+    log_part = 15.0 + np.log(np.maximum(hz, 1000.0) / 1000.0) / (np.log(6.4) / 27.0)
+    return np.where(hz >= 1000.0, log_part, hz * 3.0 / 200.0)
+
+
+def _mel_to_hz(mel):
+    mel = np.asarray(mel, dtype=np.float64)
+    log_part = 1000.0 * np.exp(np.log(6.4) / 27.0 * (mel - 15.0))
+    return np.where(mel >= 15.0, log_part, mel * 200.0 / 3.0)
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels, fmin=0.0, fmax=None):
+    """[n_mels, n_fft // 2 + 1] Slaney-normalised triangles, as librosa.filters.mel."""
+    fmax = sample_rate / 2.0 if fmax is None else fmax
+    fft_freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    edges = _mel_to_hz(np.linspace(_hz_to_mel(fmin), _hz_to_mel(fmax), n_mels + 2))
+    widths = np.diff(edges)
+    ramps = edges[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0.0, np.minimum(lower, upper))
+    return weights * (2.0 / (edges[2:] - edges[:-2]))[:, None]
+
+
+def _init_worker(params):
+    global _mel_basis, _window
+    _mel_basis = mel_filterbank(params['sample_rate'], params['filter_length'],
+                                params['mel_channels'], params['mel_fmin'],
+                                params['mel_fmax']).astype(np.float32)
+    window = np.hanning(params['win_length'] + 1)[:-1]           # periodic, as torch
+    pad = (params['filter_length'] - params['win_length']) // 2
+    _window = np.pad(window, (pad, params['filter_length'] - params['win_length'] - pad))
+    _window = _window.astype(np.float32)
+
+
+def log_mel(y, params):
+    """[frames, n_mels] log-mel spectrogram of float audio *y*."""
+    n_fft, hop = params['filter_length'], params['hop_length']
+    pad = (n_fft - hop) // 2
+    y = np.pad(y, (pad, pad), mode='reflect')
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft)[::hop]
+    spectrum = np.fft.rfft(frames * _window, axis=1)
+    magnitude = np.sqrt(spectrum.real ** 2 + spectrum.imag ** 2 + 1e-6, dtype=np.float32)
+    return np.log(np.maximum(magnitude @ _mel_basis.T, 1e-5))
+
+
+def _compute_chunk(items, params):
+    """[(utt_id, features)] for [(utt_id, wav_path)]."""
+    import soundfile as sf
+
+    results = []
+    for utt_id, path in items:
+        y, sr = sf.read(path, dtype='float32', always_2d=True)
+        if sr != params['sample_rate']:
+            raise ValueError(f"{path}: {sr} Hz, config expects {params['sample_rate']} Hz")
+        results.append((utt_id, log_mel(y.mean(axis=1), params)))
+    return results
+
+
+# =============================================================================
+# Cache
+# =============================================================================
+
+class MelCache:
+    """Read-only, zero-copy access to a mel cache directory by utterance id."""
+
+    def __init__(self, directory=CACHE_DIR):
+        with open(os.path.join(directory, "manifest.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.params = manifest['params']
+        self.entries = manifest['entries']
+        n_mels = self.params['mel_channels']
+        path = os.path.join(directory, "features.f32")
+        self.features = (np.memmap(path, dtype='<f4', mode='r').reshape(-1, n_mels)
+                         if os.path.getsize(path) else np.zeros((0, n_mels), '<f4'))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, utt_id):
+        return utt_id in self.entries
+
+    def __getitem__(self, utt_id):
+        """[n_mels, frames] view (piper_train's orientation) — no copy."""
+        entry = self.entries[utt_id]
+        return self.features[entry['offset']:entry['offset'] + entry['frames']].T
+
+
+def _read_ids(dataset_dir):
+    with open(os.path.join(dataset_dir, "metadata.csv"), 'r', encoding='utf-8') as f:
+        return [line.split('|', 1)[0] for line in f if line.strip()]
+
+
+def build_cache(dataset_dir, cache_dir, params, workers=None, chunk_size=32):
+    """
+    Bring *cache_dir* up to date with *dataset_dir*; returns
+    (computed utterances, reused utterances, computed frames, seconds).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    old = {'params': None, 'entries': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+    previous = MelCache(cache_dir) if old['params'] == params and old['entries'] else None
+
+    todo, sources = [], {}
+    for utt_id in _read_ids(dataset_dir):
+        path = os.path.join(dataset_dir, "wavs", f"{utt_id}.wav")
+        stat = os.stat(path)
+        sources[utt_id] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        entry = previous.entries.get(utt_id) if previous else None
+        if not (entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns):
+            todo.append((utt_id, path))
+
+    computed = {}
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, max(1, -(-len(todo) // chunk_size)))
+    items = iter(todo)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(params,)) as executor:
+        pending = set()
+        for chunk in iter(lambda: list(islice(items, chunk_size)), []):
+            pending.add(executor.submit(_compute_chunk, chunk, params))
+            if len(pending) >= 2 * workers:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    computed.update(future.result())
+        for future in concurrent.futures.as_completed(pending):
+            computed.update(future.result())
+    seconds = time.perf_counter() - start
+
+    # Rewrite the packed file: reused rows are copied straight from the old memmap
+    entries, offset = {}, 0
+    tmp_path = os.path.join(cache_dir, "features.f32.tmp")
+    with open(tmp_path, 'wb') as f:
+        for utt_id, source in sources.items():
+            features = computed[utt_id] if utt_id in computed else previous[utt_id].T
+            f.write(np.ascontiguousarray(features, dtype='<f4').tobytes())
+            entries[utt_id] = dict(source, offset=offset, frames=len(features))
+            offset += len(features)
+    if previous is not None:
+        del previous                      # release the old memmap before replacing it
+    os.replace(tmp_path, os.path.join(cache_dir, "features.f32"))
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'params': params, 'entries': entries}, f)
+
+    frames = sum(len(features) for features in computed.values())
+    return len(computed), len(sources) - len(computed), frames, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute a log-mel feature cache")
+    parser.add_argument("--dataset", default=DATASET_DIR,
+                        help="LJSpeech directory built by format_data.py")
+    parser.add_argument("--config", default=TRAINING_CONFIG,
+                        help="Piper training config.json (default: Piper's VITS defaults "
+                             "if it does not exist yet)")
+    parser.add_argument("--output", default=CACHE_DIR, help="Cache directory")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=32,
+                        help="Utterances handed to a worker at a time")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.dataset, "metadata.csv")):
+        print(f"ERROR: No metadata.csv in {args.dataset}")
+        print("Run 'python scripts/format_data.py' first.")
+        sys.exit(1)
+
+    params = load_params(args.config)
+    print("Mel parameters: " + ", ".join(f"{k}={v}" for k, v in params.items()))
+    computed, reused, frames, seconds = build_cache(args.dataset, args.output, params,
+                                                    args.workers, args.chunk_size)
+
+    print(f"\n=== Mel Cache ===")
+    print(f"  Computed:     {computed} utterances ({frames} frames in {seconds:.1f}s)")
+    print(f"  Reused:       {reused} utterances")
+    if computed:
+        print(f"  Throughput:   {frames / max(seconds, 1e-9):,.0f} frames/sec, "
+              f"{computed / max(seconds, 1e-9):.1f} utterances/sec")
+    print(f"  Cache:        {args.output}")
+
+
+if __name__ == "__main__":
+    main()
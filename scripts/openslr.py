@@ -0,0 +1,50 @@
+"""
+OpenSLR-64 layout helpers shared by download_dataset.py and format_data.py.
+
+Standard library only, so the downloader can pick speakers without
+importing format_data.py's audio stack (numpy, soundfile, the normaliser).
+"""
+import csv
+import time
+from collections import Counter
+
+
+def read_line_index(path):
+    """
+    ([(fid, text, speaker)], Counter of utterances per speaker) from
+    line_index.tsv; the speaker is the second "_" field of the file id.
+    """
+    rows = []
+    speaker_counts = Counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter='\t')
+        for row in reader:
+            if len(row) >= 2:
+                fid = row[0].strip()
+                text = row[1].strip()
+                parts = fid.split('_')
+                if len(parts) >= 2:
+                    speaker_id = parts[1]
+                    speaker_counts[speaker_id] += 1
+                    rows.append((fid, text, speaker_id))
+    return rows, speaker_counts
+
+
+def select_speakers(speaker_counts, top=None, names=None, min_utterances=None):
+    """
+    Speaker ids to build, most utterances first: the explicit *names*, all
+    with at least *min_utterances*, or the *top* N (default: the best one).
+    """
+    if names:
+        unknown = [name for name in names if name not in speaker_counts]
+        if unknown:
+            raise ValueError(f"unknown speaker(s): {', '.join(unknown)}")
+        return sorted(dict.fromkeys(names), key=lambda spk: -speaker_counts[spk])
+    if min_utterances is not None:
+        return [spk for spk, count in speaker_counts.most_common() if count >= min_utterances]
+    return [spk for spk, _ in speaker_counts.most_common(top or 1)]
+
+
+def zip_mtime_ns(info):
+    """Modification time of a ZipInfo as the st_mtime_ns of its extracted file."""
+    return int(time.mktime(info.date_time + (0, 0, -1))) * 10 ** 9
@@ -0,0 +1,478 @@
+"""
+Phonemize a built dataset into the dataset.jsonl + config.json piper_train reads.
+
+train.sh used to run `python -m piper_train.preprocess` before every training
+run, phonemizing every sentence again although the text had not changed.
+This stage does the same job from format_data.py output, once:
+  - phonemizers are pluggable (PHONEMIZERS): "espeak" (espeak-ng through
+    piper_phonemize, as preprocess --phoneme-type espeak), "text" (code
+    points, as --phoneme-type text) and "stub" (NFD code points with an id
+    map built from the data; deterministic and dependency-free, for tests
+    and machines without espeak-ng).  "auto" picks espeak when available.
+  - phonemes are cached in SQLite by normalised text and phonemizer
+    fingerprint (name, language, library version); only unseen texts are
+    phonemized, in chunks on a process pool
+  - normalised audio / spectrogram tensors are made by piper_train's own
+    cache_norm_audio into <output>/cache/<sample rate>, and only for clips
+    whose tensors are missing or whose WAV changed size / mtime since they
+    were made (sources.json; --skip-audio leaves them out)
+  - dataset.jsonl lines carry the fields of piper_train's Utterance (text,
+    audio_path, speaker, speaker_id, phonemes, phoneme_ids, audio_norm_path,
+    audio_spec_path, missing_phonemes); test_checkpoint.py reads the
+    first line
+A rerun with unchanged metadata.csv, WAVs and settings (phonemize.stamp)
+returns at once; one with edited text phonemizes only the texts not in the cache.
+
+Usage:
+    python scripts/phonemize.py
+    python scripts/phonemize.py --phonemizer text --workers 1
+    python scripts/phonemize.py --phonemizer stub --skip-audio --output /tmp/phonemized
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import unicodedata
+import concurrent.futures
+from collections import Counter, deque
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATASET_DIR = os.path.join(PROJECT_ROOT, "data", "ljspeech_filtered")
+TRAINING_DIR = os.path.join(PROJECT_ROOT, "training_filtered")
+
+PAD, BOS, EOS = "_", "^", "$"
+DEFAULT_NUM_SYMBOLS = 256           # piper_phonemize.get_max_phonemes()
+
+
+# =============================================================================
+# Phonemizers
+# =============================================================================
+
+class EspeakPhonemizer:
+    """espeak-ng IPA through piper_phonemize (what piper_train.preprocess uses)."""
+    name = 'espeak'
+
+    def __init__(self, language):
+        import piper_phonemize
+        self.language = language
+        self._module = piper_phonemize
+        self.version = getattr(piper_phonemize, '__version__', '')
+
+    def phonemize(self, text):
+        sentences = self._module.phonemize_espeak(text, self.language)
+        return [phoneme for sentence in sentences for phoneme in sentence]
+
+    def id_map(self, symbols):
+        return self._module.get_espeak_map()
+
+    def config(self):
+        return {'espeak': {'voice': self.language}, 'phoneme_type': 'espeak'}
+
+
+class CodepointPhonemizer(EspeakPhonemizer):
+    """Unicode code points through piper_phonemize (train.bat's text mode)."""
+    name = 'text'
+
+    def phonemize(self, text):
+        sentences = self._module.phonemize_codepoints(text)
+        return [phoneme for sentence in sentences for phoneme in sentence]
+
+    def id_map(self, symbols):
+        return self._module.get_codepoints_map()[self.language]
+
+    def config(self):
+        return {'espeak': {'voice': self.language}, 'phoneme_type': 'text'}
+
+
+class StubPhonemizer:
+    """NFD code points, lower-cased; ids assigned in sorted symbol order."""
+    name = 'stub'
+    version = '1'
+
+    def __init__(self, language):
+        self.language = language
+
+    def phonemize(self, text):
+        return list(unicodedata.normalize('NFD', text.lower()))
+
+    def id_map(self, symbols):
+        ordered = [PAD, BOS, EOS, ' '] + sorted(set(symbols) - {PAD, BOS, EOS, ' '})
+        return {symbol: [i] for i, symbol in enumerate(ordered)}
+
+    def config(self):
+        return {'espeak': {'voice': self.language}, 'phoneme_type': 'text'}
+
+
+PHONEMIZERS = {
+    'espeak': EspeakPhonemizer,
+    'text': CodepointPhonemizer,
+    'stub': StubPhonemizer,
+}
+
+
+def make_phonemizer(name, language):
+    """Instance of PHONEMIZERS[*name*]; "auto" is espeak, or stub without piper_phonemize."""
+    if name == 'auto':
+        try:
+            return EspeakPhonemizer(language)
+        except ImportError:
+            print("WARNING: piper_phonemize not installed; using the stub phonemizer")
+            return StubPhonemizer(language)
+    return PHONEMIZERS[name](language)
+
+
+def fingerprint(phonemizer):
+    return f"{phonemizer.name}:{phonemizer.language}:{phonemizer.version}"
+
+
+def phoneme_ids(phonemes, id_map, missing):
+    """BOS, then each phoneme's ids followed by PAD, then EOS (piper's layout)."""
+    pad = list(id_map[PAD])
+    ids = list(id_map[BOS]) + pad
+    for phoneme in phonemes:
+        phoneme_id = id_map.get(phoneme)
+        if phoneme_id is None:
+            missing[phoneme] += 1
+        else:
+            ids += phoneme_id
+            ids += pad
+    ids += id_map[EOS]
+    return ids
+
+
+def cache_key(text):
+    """Whitespace-normalised text: what the phoneme cache is keyed by."""
+    return ' '.join(text.split())
+
+
+# =============================================================================
+# Workers
+# =============================================================================
+
+_phonemizer = None
+_silence_detector = None
+
+
+def _init_worker(name, language):
+    global _phonemizer
+    _phonemizer = make_phonemizer(name, language)
+
+
+def _phonemize_chunk(texts):
+    return [_phonemizer.phonemize(text) for text in texts]
+
+
+def _cache_audio_chunk(paths, cache_dir, sample_rate):
+    """
+    [(audio_norm_path, audio_spec_path)] from piper_train's cache_norm_audio,
+    recomputed even when tensors for the path exist (they are stale).
+    """
+    global _silence_detector
+    from piper_train.norm_audio import cache_norm_audio, make_silence_detector
+
+    if _silence_detector is None:
+        _silence_detector = make_silence_detector()
+    return [tuple(str(p) for p in cache_norm_audio(path, cache_dir, _silence_detector,
+                                                   sample_rate, ignore_cache=True))
+            for path in paths]
+
+
+def _run_pool(function, chunks, workers, initializer=None, initargs=()):
+    """Results of function(*chunk) for every chunk, in order, on a bounded process pool."""
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                                                initargs=initargs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(function, *chunk))
+            if len(pending) >= 2 * workers:
+                results.extend(pending.popleft().result())
+        while pending:
+            results.extend(pending.popleft().result())
+    return results
+
+
+# =============================================================================
+# Phoneme cache
+# =============================================================================
+
+class PhonemeCache:
+    """
+    Phonemes by normalised text in a SQLite file, per phonemizer fingerprint.
+    The whole fingerprint's table is read at open (one query), so a run over
+    cached text does no per-utterance database work.
+    """
+
+    def __init__(self, path, fingerprint):
+        import sqlite3
+
+        self.fingerprint = fingerprint
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS phonemes ('
+                        'fingerprint TEXT, text_hash BLOB, phonemes TEXT, '
+                        'PRIMARY KEY (fingerprint, text_hash))')
+        self.entries = {bytes(key): value for key, value in self.db.execute(
+            'SELECT text_hash, phonemes FROM phonemes WHERE fingerprint = ?', (fingerprint,))}
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, text):
+        value = self.entries.get(self._hash(text))
+        return None if value is None else json.loads(value)
+
+    def put_many(self, items):
+        rows = [(self.fingerprint, self._hash(text), json.dumps(phonemes, ensure_ascii=False))
+                for text, phonemes in items]
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO phonemes VALUES (?, ?, ?)', rows)
+        self.entries.update((key, value) for _, key, value in rows)
+
+    def close(self):
+        self.db.close()
+
+
+def phonemize_texts(texts, phonemizer, cache, workers, chunk_size):
+    """
+    {text: phonemes} for the distinct *texts*; misses are phonemized on
+    *workers* processes (in-process for one worker or a single chunk) and
+    stored.  Returns (phonemes by text, number of texts phonemized).
+    """
+    result, misses = {}, []
+    for text in dict.fromkeys(texts):
+        cached = cache.get(text)
+        if cached is None:
+            misses.append(text)
+        else:
+            result[text] = cached
+    if misses:
+        chunks = [(misses[i:i + chunk_size],) for i in range(0, len(misses), chunk_size)]
+        workers = min(workers, len(chunks))
+        if workers <= 1:
+            computed = [phonemizer.phonemize(text) for text in misses]
+        else:
+            computed = _run_pool(_phonemize_chunk, chunks, workers, _init_worker,
+                                 (phonemizer.name, phonemizer.language))
+        cache.put_many(zip(misses, computed))
+        result.update(zip(misses, computed))
+    return result, len(misses)
+
+
+# =============================================================================
+# Dataset
+# =============================================================================
+
+def read_metadata(dataset_dir, multi_speaker=False):
+    """
+    [(utt_id, speaker or None, text)] from format_data.py's metadata.csv:
+    id|text|text, or id|speaker|text when built with --multi-speaker.
+    """
+    rows = []
+    with open(os.path.join(dataset_dir, "metadata.csv"), 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\r\n').split('|')
+            if len(fields) >= 2:
+                rows.append((fields[0], fields[1] if multi_speaker else None, fields[-1]))
+    return rows
+
+
+def input_stamp(args, phonemizer):
+    """
+    Hash of metadata.csv, every setting that shapes the output and (unless
+    --skip-audio) each WAV's size and mtime, so an audio-only rebuild
+    (--trim-db, the resampler) is not skipped.
+    """
+    digest = hashlib.sha256()
+    with open(os.path.join(args.dataset, "metadata.csv"), 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    if not args.skip_audio:
+        wav_dir = os.path.join(args.dataset, "wavs")
+        if os.path.isdir(wav_dir):
+            for entry in sorted(os.scandir(wav_dir), key=lambda entry: entry.name):
+                stat = entry.stat()
+                digest.update(f"{entry.name}\t{stat.st_size}\t{stat.st_mtime_ns}\n".encode())
+    digest.update(json.dumps([fingerprint(phonemizer), os.path.abspath(args.dataset),
+                              args.sample_rate, args.multi_speaker, args.skip_audio]).encode())
+    return digest.hexdigest()
+
+
+def audio_cache_paths(audio_path, cache_dir):
+    """Where piper_train's cache_norm_audio puts the tensors of *audio_path*."""
+    cache_id = hashlib.sha256(os.path.abspath(audio_path).encode()).hexdigest()
+    return (os.path.join(cache_dir, f"{cache_id}.pt"),
+            os.path.join(cache_dir, f"{cache_id}.spec.pt"))
+
+
+def cache_audio(audio_paths, cache_dir, sample_rate, workers, chunk_size):
+    """
+    {audio_path: (norm path, spec path)}; only clips whose tensors are
+    missing, or whose WAV changed size or mtime since they were made, go to
+    the pool.  Returns (paths by clip, number computed).
+
+    The tensors are named after the WAV's path, and format_data.py renumbers
+    its output, so sources.json in *cache_dir* records the size / mtime each
+    path had (as mel_cache.py's manifest does).
+    """
+    manifest_path = os.path.join(cache_dir, "sources.json")
+    sources = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            sources = json.load(f)
+    paths, todo = {}, []
+    for path in audio_paths:
+        stat = os.stat(path)
+        source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        paths[path] = audio_cache_paths(path, cache_dir)
+        if not (sources.get(path) == source and os.path.exists(paths[path][0])
+                and os.path.exists(paths[path][1])):
+            todo.append(path)
+        sources[path] = source
+    if todo:
+        os.makedirs(cache_dir, exist_ok=True)
+        chunks = [(todo[i:i + chunk_size], cache_dir, sample_rate)
+                  for i in range(0, len(todo), chunk_size)]
+        paths.update(zip(todo, _run_pool(_cache_audio_chunk, chunks,
+                                          max(1, min(workers, len(chunks))))))
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sources, f)
+        os.replace(tmp_path, manifest_path)
+    return paths, len(todo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phonemize a dataset into Piper's dataset.jsonl")
+    parser.add_argument("--dataset", default=DATASET_DIR,
+                        help="LJSpeech directory built by format_data.py")
+    parser.add_argument("--output", default=TRAINING_DIR,
+                        help="Training directory (dataset.jsonl, config.json, cache/)")
+    parser.add_argument("--phonemizer", choices=['auto'] + sorted(PHONEMIZERS), default='auto')
+    parser.add_argument("--language", default="mr", help="espeak-ng voice / language code")
+    parser.add_argument("--sample-rate", type=int, default=22050)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=256,
+                        help="Texts handed to a worker at a time")
+    parser.add_argument("--multi-speaker", action="store_true",
+                        help="metadata.csv is id|speaker|text (format_data.py --multi-speaker)")
+    parser.add_argument("--skip-audio", action="store_true",
+                        help="Do not make the normalised audio / spectrogram tensors")
+    parser.add_argument("--force", action="store_true",
+                        help="Rewrite the output even if metadata.csv, WAVs and settings are unchanged")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.dataset, "metadata.csv")):
+        print(f"ERROR: No metadata.csv in {args.dataset}")
+        print("Run 'python scripts/format_data.py' first.")
+        sys.exit(1)
+
+    phonemizer = make_phonemizer(args.phonemizer, args.language)
+    stamp = input_stamp(args, phonemizer)
+    stamp_path = os.path.join(args.output, "phonemize.stamp")
+    outputs = [os.path.join(args.output, name) for name in ("dataset.jsonl", "config.json")]
+    if not args.force and all(os.path.exists(path) for path in outputs + [stamp_path]):
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            if f.read().strip() == stamp:
+                print(f"{outputs[0]} is up to date (metadata.csv, WAVs and settings unchanged; "
+                      f"--force rewrites it)")
+                return
+
+    if not args.skip_audio:
+        try:
+            import piper_train.norm_audio  # noqa: F401
+        except ImportError:
+            print("ERROR: piper_train is not importable (it makes the audio tensors).")
+            print("Set PYTHONPATH=piper_train/src/python as train.sh does, or pass --skip-audio.")
+            sys.exit(1)
+
+    os.makedirs(args.output, exist_ok=True)
+    rows = read_metadata(args.dataset, args.multi_speaker)
+    texts = [cache_key(text) for _, _, text in rows]
+
+    start = time.perf_counter()
+    cache = PhonemeCache(os.path.join(args.output, "phoneme_cache.sqlite"),
+                         fingerprint(phonemizer))
+    try:
+        phonemes, phonemized = phonemize_texts(texts, phonemizer, cache,
+                                               args.workers, args.chunk_size)
+    finally:
+        cache.close()
+    text_seconds = time.perf_counter() - start
+
+    wav_dir = os.path.abspath(os.path.join(args.dataset, "wavs"))
+    audio_paths = [os.path.join(wav_dir, f"{utt_id}.wav") for utt_id, _, _ in rows]
+    audio_cached, audio_computed = {}, 0
+    start = time.perf_counter()
+    if not args.skip_audio:
+        cache_dir = os.path.join(os.path.abspath(args.output), "cache", str(args.sample_rate))
+        audio_cached, audio_computed = cache_audio(audio_paths, cache_dir, args.sample_rate,
+                                                   args.workers, max(1, args.chunk_size // 8))
+    audio_seconds = time.perf_counter() - start
+
+    speaker_counts = Counter(speaker for _, speaker, _ in rows if speaker is not None)
+    speaker_ids = {speaker: i for i, (speaker, _) in enumerate(speaker_counts.most_common())}
+    id_map = phonemizer.id_map({p for sequence in phonemes.values() for p in sequence})
+    missing_total = Counter()
+    ids_by_text = {}
+    written = skipped = 0
+    tmp_path = os.path.join(args.output, "dataset.jsonl.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for (utt_id, speaker, _), text, audio_path in zip(rows, texts, audio_paths):
+            if not phonemes[text]:
+                skipped += 1
+                continue
+            if text not in ids_by_text:
+                missing = Counter()
+                ids_by_text[text] = phoneme_ids(phonemes[text], id_map, missing), dict(missing)
+            ids, missing = ids_by_text[text]
+            missing_total.update(missing)
+            norm_path, spec_path = audio_cached.get(audio_path, (None, None))
+            f.write(json.dumps({
+                'text': text, 'audio_path': audio_path, 'speaker': speaker,
+                'speaker_id': speaker_ids.get(speaker), 'phonemes': phonemes[text],
+                'phoneme_ids': ids, 'audio_norm_path': norm_path,
+                'audio_spec_path': spec_path, 'missing_phonemes': missing,
+            }, ensure_ascii=False) + '\n')
+            written += 1
+    os.replace(tmp_path, os.path.join(args.output, "dataset.jsonl"))
+
+    config = {
+        'dataset': os.path.basename(os.path.normpath(args.dataset)),
+        'audio': {'sample_rate': args.sample_rate, 'quality': 'medium'},
+        'language': {'code': args.language},
+        'inference': {'noise_scale': 0.667, 'length_scale': 1, 'noise_w': 0.8},
+        'phoneme_map': {},
+        'phoneme_id_map': id_map,
+        'num_symbols': max(DEFAULT_NUM_SYMBOLS, max(i for ids in id_map.values() for i in ids) + 1),
+        'num_speakers': max(len(speaker_ids), 1),
+        'speaker_id_map': speaker_ids,
+    }
+    config.update(phonemizer.config())
+    with open(os.path.join(args.output, "config.json"), 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=4)
+    with open(stamp_path, 'w', encoding='utf-8') as f:
+        f.write(stamp + '\n')
+
+    distinct = len(phonemes)
+    print(f"=== Phonemization ({fingerprint(phonemizer)}) ===")
+    print(f"  Utterances:   {written} written, {skipped} without phonemes skipped")
+    print(f"  Texts:        {distinct} distinct, {phonemized} phonemized, "
+          f"{distinct - phonemized} from cache ({text_seconds:.2f}s)")
+    if args.skip_audio:
+        print(f"  Audio:        skipped (--skip-audio)")
+    else:
+        print(f"  Audio:        {audio_computed} clips normalised, "
+              f"{len(audio_paths) - audio_computed} from cache ({audio_seconds:.2f}s)")
+    if missing_total:
+        print(f"  Missing phonemes: " + ", ".join(f"{p!r} ({n})" for p, n in
+                                                  missing_total.most_common(10)))
+    print(f"  Output:       {os.path.join(args.output, 'dataset.jsonl')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Pick a training subset that covers the corpus's text content on fewer hours.
+
+Much of a read-speech corpus repeats the same syllables.  This tool takes a
+built dataset (metadata.csv + lengths.tsv from format_data.py) and selects
+utterances under a budget (--hours or --count) that maximise coverage of:
+  - graphemes: Devanagari aksharas (consonant cluster + vowel sign + nasal)
+    and independent vowels
+  - conjuncts: consonant clusters joined by a virama (क्ष, स्त्र, ...)
+  - character n-grams of the normalised text (--ngrams, default 2 and 3)
+Every distinct unit is worth one point until it has been seen --target
+times; after that it is worth a small, shrinking amount, so once every unit
+is covered the rest of the budget still goes to the least-covered ones.
+Coverage of this kind is submodular, so greedy selection is near optimal,
+and lazy greedy (a max-heap of stale gains, re-scored only when
+popped) needs a small fraction of the re-evaluations.  With --hours an
+utterance is ranked by gain per second, so long clips must earn their cost.
+
+The subset is written as an LJSpeech directory (metadata.csv, lengths.tsv
+and wavs/ linked to the originals, ids unchanged) with coverage.json; the
+coverage report is also printed.
+
+Usage:
+    python scripts/select_subset.py --hours 2
+    python scripts/select_subset.py --count 2000 --target 3 --output data/ljspeech_subset
+    python scripts/select_subset.py selftest
+"""
+import os
+import re
+import sys
+import json
+import time
+import heapq
+import shutil
+import argparse
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATASET_DIR = os.path.join(PROJECT_ROOT, "data", "ljspeech_filtered")
+SUBSET_DIR = os.path.join(PROJECT_ROOT, "data", "ljspeech_subset")
+
+_CONSONANT = r'[क-हक़-य़ॸ-ॿ]़?'
+_GRAPHEME_RE = re.compile(
+    rf'(?:{_CONSONANT}्)*{_CONSONANT}(?:्|[ा-ौॢॣ])?[ऀ-ः]?'
+    r'|[ऄ-औॠॡॲ-ॷ][ऀ-ः]?')
+_CONJUNCT_RE = re.compile(rf'(?:{_CONSONANT}्)+{_CONSONANT}')
+_SPACES_RE = re.compile(r'\s+')
+# Worth of a unit already seen --target times (divided by 1, 2, ... as it
+# keeps being picked): small enough that any unit still under the target wins
+SATURATED_WEIGHT = 1e-3
+
+
+def read_dataset(dataset_dir):
+    """[(id, metadata line, text)] and {id: seconds} of a built dataset."""
+    rows = []
+    with open(os.path.join(dataset_dir, "metadata.csv"), 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line:
+                fields = line.split('|')
+                rows.append((fields[0], line, fields[-1]))
+    lengths_path = os.path.join(dataset_dir, "lengths.tsv")
+    if os.path.exists(lengths_path):
+        from batch_buckets import read_lengths
+        ids, seconds, _ = read_lengths(lengths_path)
+        durations = dict(zip(ids, seconds.tolist()))
+    else:
+        import soundfile as sf
+        durations = {utt_id: sf.info(os.path.join(dataset_dir, "wavs", f"{utt_id}.wav")).duration
+                     for utt_id, _, _ in rows}
+    return rows, durations
+
+
+def extract_units(texts, ngrams=(2, 3)):
+    """
+    (feature ids per utterance as a CSR pair (offsets, ids), feature names,
+    feature kinds, corpus occurrences per feature).  n-grams are hashed in
+    numpy from code points; graphemes and conjuncts come from one regex scan.
+    """
+    owners, keys = [], []
+    names = {}
+
+    # Graphemes and conjuncts: regex, then a dict from unit to key
+    for kind, regex in (('grapheme', _GRAPHEME_RE), ('conjunct', _CONJUNCT_RE)):
+        for i, text in enumerate(texts):
+            for unit in regex.findall(text):
+                key = names.setdefault((kind, unit), len(names))
+                owners.append(i)
+                keys.append(key)
+    owners = np.array(owners, dtype=np.int64)
+    keys = np.array(keys, dtype=np.int64)
+
+    # n-grams: code points of all texts back to back, one value per window
+    # (digits in base len(alphabet) + 1 under a leading digit for the n-gram size)
+    texts = [_SPACES_RE.sub(' ', text.strip()) for text in texts]
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype='<u4')
+    present = np.zeros(0x110000, dtype=bool)
+    present[codes] = True
+    alphabet = np.flatnonzero(present)
+    codes = np.cumsum(present, dtype=np.int64)[codes]          # 1-based alphabet index
+    base = len(alphabet) + 1
+    text_of = np.repeat(np.arange(len(texts)), lengths)
+    ends = np.cumsum(lengths)
+    gram_owners, gram_values = [], []
+    for slot, n in enumerate(ngrams):
+        windows = len(codes) - n + 1
+        if windows <= 0:
+            continue
+        value = np.full(windows, slot + 1, dtype=np.int64)
+        for j in range(n):
+            value = value * base + codes[j:j + windows]
+        inside = np.arange(windows) + n <= ends[text_of[:windows]]
+        gram_owners.append(text_of[:windows][inside])
+        gram_values.append(value[inside])
+    values, gram_ids = np.unique(np.concatenate(gram_values) if gram_values
+                                 else np.zeros(0, np.int64), return_inverse=True)
+
+    feature_names = [unit for _, unit in names]
+    feature_kinds = [kind for kind, _ in names]
+    for value in values.tolist():
+        chars = []
+        while value >= base:
+            value, code = divmod(value, base)
+            chars.append(chr(int(alphabet[code - 1])))
+        feature_names.append(''.join(reversed(chars)))
+        feature_kinds.append(f"{ngrams[value - 1]}-gram")
+    owners = np.concatenate([owners] + gram_owners)
+    ids = np.concatenate((keys, gram_ids.ravel() + len(names)))
+
+    occurrences = np.bincount(ids, minlength=len(feature_names))
+    # One entry per (utterance, feature)
+    pairs = np.sort(owners * len(feature_names) + ids)
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+    utt = pairs // len(feature_names)
+    offsets = np.searchsorted(utt, np.arange(len(texts) + 1))
+    return (offsets, pairs % len(feature_names)), feature_names, feature_kinds, occurrences
+
+
+def lazy_greedy(features, durations, target=1, max_count=None, max_seconds=None):
+    """
+    Indices of the selected utterances, in selection order.  *features* is
+    the (offsets, ids) CSR pair from extract_units.  A feature seen fewer
+    than *target* times so far is worth 1; after that it is worth
+    SATURATED_WEIGHT / (times past the target + 1), so once coverage is
+    saturated the rest of the budget still goes to the least-covered units.
+    Gains only ever shrink, so a stale heap score stays an upper bound and
+    one lazy pass suffices.
+    """
+    offsets, ids = features
+    n_features = int(ids.max()) + 1 if len(ids) else 0
+    seen = np.zeros(n_features, dtype=np.int64)
+    worth = np.ones(n_features)                   # current gain of each feature
+    cost = (np.maximum(durations, 1e-3) if max_seconds is not None
+            else np.ones(len(durations))).tolist()
+    bounds = offsets.tolist()
+    lengths = durations.tolist()
+
+    # Every feature is worth at most 1, so feature counts are valid stale scores
+    heap = [(-(bounds[i + 1] - bounds[i]) / cost[i], i) for i in range(len(lengths))]
+    heapq.heapify(heap)
+    selected, spent = [], 0.0
+    while heap:
+        if max_count is not None and len(selected) >= max_count:
+            break
+        _, i = heapq.heappop(heap)
+        if max_seconds is not None and spent + lengths[i] > max_seconds:
+            continue                          # does not fit; smaller clips may
+        units = ids[bounds[i]:bounds[i + 1]]
+        score = float(np.add.reduce(worth[units])) / cost[i]
+        if score <= 0:
+            continue
+        if heap and score < -heap[0][0]:
+            heapq.heappush(heap, (-score, i))  # stale: re-queue with its real gain
+            continue
+        selected.append(i)
+        spent += lengths[i]
+        seen[units] += 1
+        worth[units] = np.where(seen[units] < target, 1.0,
+                                SATURATED_WEIGHT / (np.maximum(seen[units] - target, 0) + 1))
+    return selected
+
+
+def coverage_report(features, kinds, occurrences, selected, target):
+    """Per feature kind: distinct units, covered units, share of corpus occurrences covered."""
+    offsets, ids = features
+    chosen = np.concatenate([ids[offsets[i]:offsets[i + 1]] for i in selected]) \
+        if selected else np.zeros(0, dtype=np.int64)
+    counts = np.bincount(chosen, minlength=len(kinds))
+    kinds = np.array(kinds)
+    report = {}
+    for kind in dict.fromkeys(kinds.tolist()):
+        mask = kinds == kind
+        report[kind] = {
+            'distinct': int(mask.sum()),
+            'covered': int((counts[mask] > 0).sum()),
+            'at_target': int((counts[mask] >= target).sum()),
+            'occurrences_covered': float(occurrences[mask & (counts > 0)].sum() /
+                                         max(occurrences[mask].sum(), 1)),
+        }
+    return report, counts
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def self_test():
+    """Budgets are filled even after coverage saturates; returns True on success."""
+    rng = np.random.default_rng(0)
+    letters = [chr(code) for code in range(ord('क'), ord('क') + 8)]
+    texts = [' '.join(''.join(rng.choice(letters, 3)) for _ in range(rng.integers(3, 8)))
+             for _ in range(3000)]
+    durations = rng.uniform(2.0, 8.0, len(texts))
+    features, _, _, _ = extract_units(texts)
+    failures = 0
+
+    def check(name, ok):
+        nonlocal failures
+        failures += not ok
+        print(f"  {'✓' if ok else '✗'} {name}")
+
+    budget = 2 * 3600.0
+    selected = lazy_greedy(features, durations, 1, max_seconds=budget)
+    hours = durations[selected].sum() / 3600
+    check(f"--hours 2 fills the budget ({hours:.3f} h)",
+          budget - durations.max() <= durations[selected].sum() <= budget)
+    selected = lazy_greedy(features, durations, 1, max_count=1000)
+    check(f"--count 1000 fills the budget ({len(selected)} utterances)", len(selected) == 1000)
+    check("no utterance selected twice", len(set(selected)) == len(selected))
+    selected = lazy_greedy(features, durations, 1, max_seconds=100 * 3600)
+    check(f"a budget above the corpus takes all of it ({len(selected)} of {len(texts)})",
+          len(selected) == len(texts))
+
+    print(f"\n{'All tests passed.' if not failures else f'{failures} test(s) FAILED.'}")
+    return failures == 0
+
+
+def main():
+    if sys.argv[1:] == ['selftest']:
+        sys.exit(0 if self_test() else 1)
+    parser = argparse.ArgumentParser(description="Select a coverage-maximising training subset")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="Dataset built by format_data.py")
+    parser.add_argument("--output", default=SUBSET_DIR, help="Subset directory to write")
+    budget = parser.add_mutually_exclusive_group(required=True)
+    budget.add_argument("--hours", type=float, help="Audio budget in hours")
+    budget.add_argument("--count", type=int, help="Utterance budget")
+    parser.add_argument("--target", type=int, default=1,
+                        help="Times each unit should be covered (default: 1)")
+    parser.add_argument("--ngrams", type=int, nargs="*", default=[2, 3],
+                        help="Character n-gram sizes to cover (default: 2 3)")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.dataset, "metadata.csv")):
+        print(f"ERROR: No metadata.csv in {args.dataset}")
+        print("Run 'python scripts/format_data.py' first.")
+        sys.exit(1)
+
+    rows, duration_by_id = read_dataset(args.dataset)
+    durations = np.array([duration_by_id[utt_id] for utt_id, _, _ in rows])
+    start = time.perf_counter()
+    features, names, kinds, occurrences = extract_units([text for _, _, text in rows],
+                                                        tuple(args.ngrams))
+    extracted = time.perf_counter()
+    selected = lazy_greedy(features, durations, args.target, args.count,
+                           args.hours * 3600 if args.hours is not None else None)
+    finished = time.perf_counter()
+    report, counts = coverage_report(features, kinds, occurrences, selected, args.target)
+
+    # Write the subset (original ids, corpus order)
+    chosen = sorted(selected)
+    if os.path.exists(args.output):
+        shutil.rmtree(args.output)
+    os.makedirs(os.path.join(args.output, "wavs"))
+    with open(os.path.join(args.output, "metadata.csv"), 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(rows[i][1] for i in chosen))
+    with open(os.path.join(args.output, "lengths.tsv"), 'w', encoding='utf-8', newline='\n') as f:
+        f.write(''.join(f"{rows[i][0]}\t{durations[i]:.3f}\t{len(rows[i][2])}\n" for i in chosen))
+    for i in chosen:
+        _link_or_copy(os.path.join(args.dataset, "wavs", f"{rows[i][0]}.wav"),
+                      os.path.join(args.output, "wavs", f"{rows[i][0]}.wav"))
+
+    missed = [(int(occurrences[k]), kinds[k], names[k]) for k in np.flatnonzero(counts == 0)]
+    missed.sort(reverse=True)
+    summary = {
+        'config': {'dataset': args.dataset, 'hours': args.hours, 'count': args.count,
+                   'target': args.target, 'ngrams': args.ngrams},
+        'selected': {'utterances': len(selected), 'hours': float(durations[selected].sum() / 3600)},
+        'corpus': {'utterances': len(rows), 'hours': float(durations.sum() / 3600)},
+        'coverage': report,
+        'most_frequent_uncovered': [{'kind': kind, 'unit': unit, 'occurrences': count}
+                                    for count, kind, unit in missed[:50]],
+    }
+    with open(os.path.join(args.output, "coverage.json"), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"=== Coverage Subset ===")
+    print(f"  Selected:     {len(selected)} of {len(rows)} utterances, "
+          f"{summary['selected']['hours']:.2f} of {summary['corpus']['hours']:.2f} h")
+    print(f"  Time:         {extracted - start:.2f}s features, {finished - extracted:.2f}s selection")
+    if args.hours is not None and summary['selected']['hours'] < 0.99 * args.hours:
+        print(f"  WARNING: only {summary['selected']['hours']:.2f} of the {args.hours} h budget "
+              f"used; no clip left fits the rest")
+    if args.count is not None and len(selected) < args.count:
+        print(f"  WARNING: only {len(selected)} of the {args.count} utterance budget used; "
+              f"the corpus has no more")
+    print(f"  {'unit':10s} {'distinct':>9s} {'covered':>9s} {'at target':>10s} {'of occurrences':>15s}")
+    for kind, r in report.items():
+        print(f"  {kind:10s} {r['distinct']:>9} {r['covered'] / max(r['distinct'], 1):>9.1%} "
+              f"{r['at_target'] / max(r['distinct'], 1):>10.1%} {r['occurrences_covered']:>15.2%}")
+    if missed:
+        print("  Most frequent uncovered: " +
+              ", ".join(f"{unit} ({count})" for count, _, unit in missed[:10]))
+    print(f"  Output:       {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Speaking-rate outliers: clips whose audio does not fit their transcript.
+
+A truncated recording or a wrong line in line_index.tsv passes the duration
+and RMS filters but speaks far too fast or too slow for its text.  For every
+utterance this module measures, in one vectorised pass over the concatenated
+code points of all transcripts:
+  - characters per second (letters, marks and digits; no spaces/punctuation)
+  - phonemes per second, a Devanagari proxy: a consonant counts two (with
+    its inherent vowel), a virama takes one back, a vowel sign replaces the
+    inherent vowel, independent vowels / anusvara / visarga / other letters
+    count one
+Each speaker's rates get a robust z-score (median and MAD, scaled to match a
+standard deviation; the mean absolute deviation when the MAD is 0), and clips
+beyond the limit on either rate are outliers.
+"""
+import unicodedata
+
+import numpy as np
+
+MAD_SCALE = 1.4826            # MAD of a normal distribution x this = its sigma
+MEAN_AD_SCALE = 1.2533        # the same for its mean absolute deviation (sqrt(pi / 2))
+_TABLE_SIZE = 0x0980          # explicit weights up to the end of Devanagari
+_ZERO_WIDTH = (0x200C, 0x200D)
+
+_tables = None
+
+
+def _weight_tables():
+    """(character weight, phoneme weight) per code point below _TABLE_SIZE."""
+    global _tables
+    if _tables is None:
+        chars = np.zeros(_TABLE_SIZE, dtype=np.int8)
+        phones = np.zeros(_TABLE_SIZE, dtype=np.int8)
+        for cp in range(_TABLE_SIZE):
+            if unicodedata.category(chr(cp))[0] in 'LMN':
+                chars[cp] = phones[cp] = 1
+        chars[0x093C] = phones[0x093C] = 0                    # nukta
+        phones[0x0915:0x093A] = 2                             # consonants
+        phones[0x0958:0x0960] = 2                             # nukta consonants
+        phones[0x0979:0x0980] = 2
+        phones[0x093E:0x094D] = 0                             # vowel signs
+        phones[0x0962:0x0964] = 0
+        phones[0x094D] = -1                                   # virama
+        _tables = chars, phones
+    return _tables
+
+
+def text_units(texts):
+    """(characters, phoneme proxy) per text, as int64 arrays."""
+    char_table, phone_table = _weight_tables()
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype='<u4')
+    inside = codes < _TABLE_SIZE
+    clipped = np.where(inside, codes, 0)
+    outside = ~inside & (codes != _ZERO_WIDTH[0]) & (codes != _ZERO_WIDTH[1])
+    chars = np.where(inside, char_table[clipped], outside).astype(np.int64)
+    phones = np.where(inside, phone_table[clipped], outside).astype(np.int64)
+    # Per-text sums as differences of running totals (empty texts give 0)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    running = [np.concatenate(([0], np.cumsum(values))) for values in (chars, phones)]
+    return tuple(total[ends] - total[starts] for total in running)
+
+
+def robust_z(values, groups):
+    """
+    (values - group median) / (MAD_SCALE x group MAD), per group id in
+    *groups*.  When more than half a group shares one value its MAD is 0;
+    the scaled mean absolute deviation is used instead, and a group with no
+    spread at all gets z = 0 (nothing to call an outlier).
+    """
+    z = np.zeros(len(values))
+    for group in np.unique(groups):
+        members = groups == group
+        median = np.median(values[members])
+        deviations = np.abs(values[members] - median)
+        scale = np.median(deviations) * MAD_SCALE
+        if scale <= 0:
+            scale = deviations.mean() * MEAN_AD_SCALE
+        if scale > 0:
+            z[members] = (values[members] - median) / scale
+    return z
+
+
+def rate_outliers(texts, durations, speakers, max_z):
+    """
+    Speaking-rate statistics for parallel lists of normalised *texts*,
+    *durations* (seconds) and *speakers*.  Returns a dict of arrays:
+    chars, phones, chars_per_sec, phones_per_sec, z (the larger |z| of the
+    two rates, signed) and outlier (|z| > *max_z*).
+    """
+    chars, phones = text_units(texts)
+    durations = np.maximum(np.asarray(durations, dtype=np.float64), 1e-3)
+    _, groups = np.unique(np.asarray(speakers), return_inverse=True)
+    chars_per_sec = chars / durations
+    phones_per_sec = phones / durations
+    z_chars = robust_z(chars_per_sec, groups)
+    z_phones = robust_z(phones_per_sec, groups)
+    z = np.where(np.abs(z_chars) >= np.abs(z_phones), z_chars, z_phones)
+    return {'chars': chars, 'phones': phones, 'chars_per_sec': chars_per_sec,
+            'phones_per_sec': phones_per_sec, 'z': z, 'outlier': np.abs(z) > max_z}
+
+
+def histogram(values, marked=None, bins=20, width=40):
+    """Text histogram of *values*; counts of *marked* values are shown as 'x'."""
+    if len(values) == 0:
+        return "    (no data)"
+    counts, edges = np.histogram(values, bins=bins)
+    flagged = (np.histogram(values[marked], bins=edges)[0] if marked is not None
+               else np.zeros_like(counts))
+    scale = width / max(counts.max(), 1)
+    lines = []
+    for count, bad, low, high in zip(counts, flagged, edges[:-1], edges[1:]):
+        bar = 'x' * int(round(bad * scale)) + '#' * int(round((count - bad) * scale))
+        lines.append(f"    {low:7.2f} - {high:7.2f} | {bar:<{width}} {count}")
+    return '\n'.join(lines)
@@ -84,22 +84,22 @@ echo.
 
 :: ── Step 1: Preprocessing ────────────────────────────────────────────────────
 ::
-::  --phoneme-type text  uses raw Devanagari characters as input tokens.
+::  --phonemizer text    uses raw Devanagari characters as input tokens.
 ::  This is the only option that works on Windows without espeak-ng.
 ::  It is NOT compatible with fine-tuning from the English Lessac checkpoint.
 ::  Training always starts from scratch in this mode.
 ::
+::  scripts\phonemize.py caches phonemes and audio tensors, so reruns only
+::  process new or changed utterances.
+::
 echo [Step 1/2] Running preprocessing...
-venv\Scripts\python.exe -u -m piper_train.preprocess ^
+venv\Scripts\python.exe -u scripts\phonemize.py ^
+    --phonemizer text ^
     --language mr ^
-    --input-dir "%CD%\data\ljspeech_filtered" ^
-    --output-dir "%DATASET_DIR%" ^
-    --dataset-format ljspeech ^
-    --single-speaker ^
+    --dataset "%CD%\data\ljspeech_filtered" ^
+    --output "%DATASET_DIR%" ^
     --sample-rate 22050 ^
-    --phoneme-type text ^
-    --max-workers 1 ^
-    --debug
+    --workers 1
 
 if %ERRORLEVEL% neq 0 (
     echo.
@@ -37,13 +37,14 @@ if [ ! -d "$PROJECT_ROOT/data/ljspeech_filtered/wavs" ]; then
     exit 1
 fi
 
+# Phonemes are cached by text and audio tensors by file, so only new or
+# changed utterances are processed; an unchanged dataset is skipped outright.
 echo "[Step 1/2] Preprocessing dataset..."
-python3 -m piper_train.preprocess \
+python3 scripts/phonemize.py \
+    --phonemizer espeak \
     --language mr \
-    --input-dir "$PROJECT_ROOT/data/ljspeech_filtered" \
-    --output-dir "$DATASET_DIR" \
-    --dataset-format ljspeech \
-    --single-speaker \
+    --dataset "$PROJECT_ROOT/data/ljspeech_filtered" \
+    --output "$DATASET_DIR" \
     --sample-rate 22050
 
 echo ""